@@ -0,0 +1,724 @@
+"""Fruit Catcher Benchmarks | Benchmark.py
+
+This file is responsible for measuring the vision pipeline without a webcam. Frames are read from a video file or
+generated with a moving green marker, so the benchmarks run headless on any machine. The latency benchmark plays the
+real game loop on such frames, handed out at a webcam's frame rate, and measures the delay from frame capture to the
+basket being on the display.
+
+Usage
+-----
+    python Benchmark.py pipeline
+    python Benchmark.py pipeline --video recording.avi --save baseline.json
+    python Benchmark.py pipeline --compare baseline.json
+    python Benchmark.py scales
+    python Benchmark.py scales --video recording.avi
+    python Benchmark.py segmentation
+    python Benchmark.py allocations
+    python Benchmark.py backends --video recording.avi
+    python Benchmark.py latency --width 640 --height 480 --seconds 10
+    python Benchmark.py latency --control direct --max-latency 60
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy
+
+import Camera
+import Engine
+import ObjectDetection
+import Profiler
+
+# Frame sizes benchmark_pipeline runs at
+resolutions = [(320, 240), (640, 480), (1280, 720), (1920, 1080)]
+
+
+def synthetic_frames(count=120, width=640, height=480, seed=0):
+    """
+
+    Makes frames of a green marker moving across a noisy background.
+
+    The marker colour is inside the filter_green thresholds and the background is not, so every frame has exactly one
+    target to find.
+
+    Parameters
+    ----------
+        count : int, optional
+        Number of frames to make
+
+        width : int, optional
+        Width of frames
+
+        height : int, optional
+        Height of frames
+
+        seed : int, optional
+        Seed of the background noise
+
+    Return
+    ----------
+        List of frames
+
+    """
+    random = numpy.random.RandomState(seed)
+    background = random.randint(0, 90, (height, width, 3)).astype(numpy.uint8)
+    size = max(height // 10, 8)
+    frames = []
+
+    for i in range(count):
+        frame = background.copy()
+        x = int((width - size) * (0.5 + 0.45 * numpy.sin(i / 15.0)))
+        y = int((height - size) * (0.5 + 0.25 * numpy.cos(i / 23.0)))
+        frame[y:y + size, x:x + size] = (50, 200, 50)
+        frames.append(frame)
+
+    return frames
+
+
+def video_frames(path, count=None):
+    """
+
+    Reads frames from a recorded video.
+
+    Parameters
+    ----------
+        path : str
+        Path of the video file
+
+        count : int, optional
+        Most frames to read, all of them by default
+
+    Return
+    ----------
+        List of frames
+
+    """
+    video_input = cv2.VideoCapture(path)
+    frames = []
+
+    while count is None or len(frames) < count:
+        ok, frame = video_input.read()
+        if not ok:
+            break
+        frames.append(frame)
+
+    video_input.release()
+    return frames
+
+
+def percentiles(times):
+    """
+
+    Latency summary of a list of times.
+
+    Parameters
+    ----------
+        times : list
+        Times in seconds
+
+    Return
+    ----------
+        (p50, p95, p99) in milliseconds
+
+    """
+    p50, p95, p99 = numpy.percentile(numpy.array(times) * 1000, [50, 95, 99])
+    return p50, p95, p99
+
+
+def benchmark_scales(frames, scales=(1, 0.5, 0.25), refine=False):
+    """
+
+    Latency and accuracy of the Detector at each processing scale.
+
+    Region of interest tracking is off so every frame is a full search. Accuracy is measured against the full
+    resolution results: agreement is the share of frames where both found or both missed the marker, error is the mean
+    x distance in pixels over frames where both found it.
+
+    Parameters
+    ----------
+        frames : list
+        Frames to search
+
+        scales : tuple, optional
+        Processing scales to measure
+
+        refine : bool, optional
+        Whether coarse rectangles are searched again at full resolution
+
+    Return
+    ----------
+        Dictionary of scale to (p50, p95, p99, agreement, error)
+
+    """
+    reference = [ObjectDetection.find_rect(frame) for frame in frames]
+    results = {}
+
+    for scale in scales:
+        detector = ObjectDetection.Detector(roi=False, scale=scale, refine=refine)
+        times = []
+        errors = []
+        agreed = 0
+
+        for frame, expected in zip(frames, reference):
+            start = time.perf_counter()
+            rect = detector.find(frame)
+            times.append(time.perf_counter() - start)
+
+            if (rect is None) == (expected is None):
+                agreed += 1
+            if rect is not None and expected is not None:
+                errors.append(abs(rect[0] - expected[0]))
+
+        error = float(numpy.mean(errors)) if errors else float("nan")
+        results[scale] = percentiles(times) + (agreed / len(frames), error)
+
+    return results
+
+
+def print_scales(results):
+    """
+
+    Prints the results of benchmark_scales as a table.
+
+    """
+    print("%8s %9s %9s %9s %10s %9s" % ("scale", "p50 ms", "p95 ms", "p99 ms", "agreement", "x error"))
+    for scale, (p50, p95, p99, agreement, error) in results.items():
+        print("%8.3g %9.3f %9.3f %9.3f %9.1f%% %9.2f" % (scale, p50, p95, p99, agreement * 100, error))
+
+
+def benchmark_segmentation(frames, bits=(8, 6, 5)):
+    """
+
+    Throughput and correctness of lookup table segmentation against filter_green.
+
+    Besides the given frames, correctness is also checked on a frame of uniformly random colours, which puts pixels
+    right at the threshold edges where quantization can differ.
+
+    Parameters
+    ----------
+        frames : list
+        Frames to segment
+
+        bits : tuple, optional
+        Lookup table sizes to measure, in bits kept per channel
+
+    Return
+    ----------
+        Dictionary of method name to (p50, p95, p99, megapixels per second, mismatch on frames, mismatch on noise)
+
+    """
+    noise = numpy.random.RandomState(1).randint(0, 256, frames[0].shape).astype(numpy.uint8)
+    methods = [("cvtColor+inRange", ObjectDetection.filter_green)]
+    for bit in bits:
+        methods.append(("lut %d bits" % bit, lambda frame, bit=bit: ObjectDetection.filter_green_lut(frame, bit)))
+
+    pixels = frames[0].shape[0] * frames[0].shape[1]
+    results = {}
+
+    for name, segment in methods:
+        segment(frames[0])
+        times = []
+        mismatched = 0
+
+        for frame in frames:
+            start = time.perf_counter()
+            mask = segment(frame)
+            times.append(time.perf_counter() - start)
+            mismatched += numpy.count_nonzero(mask != ObjectDetection.filter_green(frame))
+
+        noise_mismatch = numpy.count_nonzero(segment(noise) != ObjectDetection.filter_green(noise)) / pixels
+        throughput = pixels / numpy.median(times) / 1e6
+        results[name] = percentiles(times) + (throughput, mismatched / (pixels * len(frames)), noise_mismatch)
+
+    return results
+
+
+def check_segmentation(results, tolerance=0.02):
+    """
+
+    Finds lookup tables that do not segment like filter_green.
+
+    The 8 bit table keeps every colour, so it has to match filter_green exactly. Smaller tables quantize colours near
+    the threshold edges and may differ there, on at most tolerance of the pixels of the frames or of the noise frame.
+
+    Parameters
+    ----------
+        results : dict
+        Results of benchmark_segmentation
+
+        tolerance : float, optional
+        Largest share of mismatched pixels allowed for tables under 8 bits
+
+    Return
+    ----------
+        List of (method, mismatch on frames, mismatch on noise) for every table that failed
+
+    """
+    failures = []
+
+    for name, (_, _, _, _, mismatch, noise) in results.items():
+        if not name.startswith("lut"):
+            continue
+        allowed = 0 if name == "lut 8 bits" else tolerance
+        if mismatch > allowed or noise > allowed:
+            failures.append((name, mismatch, noise))
+
+    return failures
+
+
+def print_segmentation(results):
+    """
+
+    Prints the results of benchmark_segmentation as a table.
+
+    """
+    print("%-18s %9s %9s %9s %9s %10s %10s" % ("method", "p50 ms", "p95 ms", "p99 ms", "Mpx/s", "mismatch", "noise"))
+    for name, (p50, p95, p99, throughput, mismatch, noise) in results.items():
+        print("%-18s %9.3f %9.3f %9.3f %9.1f %9.3f%% %9.3f%%" % (name, p50, p95, p99, throughput, mismatch * 100,
+                                                              noise * 100))
+
+
+def benchmark_backends(frames):
+    """
+
+    Latency and agreement of each blob backend.
+
+    Region of interest tracking is off so every frame is a full search. The contours backend is the reference: agreement
+    is the share of frames where a backend found or missed the marker with it, error is the mean centroid distance in
+    pixels over frames where both found it.
+
+    Parameters
+    ----------
+        frames : list
+        Frames to search
+
+    Return
+    ----------
+        Dictionary of backend name to (p50, p95, p99, agreement, error)
+
+    """
+    reference = ObjectDetection.Detector(roi=False, backend="contours")
+    expected = []
+    for frame in frames:
+        reference.find(frame)
+        expected.append(reference.blob)
+
+    results = {}
+
+    for name in ObjectDetection.blob_backends:
+        detector = ObjectDetection.Detector(roi=False, backend=name)
+        times = []
+        errors = []
+        agreed = 0
+
+        for frame, target in zip(frames, expected):
+            start = time.perf_counter()
+            detector.find(frame)
+            times.append(time.perf_counter() - start)
+
+            blob = detector.blob
+            if (blob is None) == (target is None):
+                agreed += 1
+            if blob is not None and target is not None:
+                errors.append(numpy.hypot(blob.centroid[0] - target.centroid[0], blob.centroid[1] - target.centroid[1]))
+
+        error = float(numpy.mean(errors)) if errors else float("nan")
+        results[name] = percentiles(times) + (agreed / len(frames), error)
+
+    return results
+
+
+def print_backends(results):
+    """
+
+    Prints the results of benchmark_backends as a table.
+
+    """
+    print("%-12s %9s %9s %9s %10s %9s" % ("backend", "p50 ms", "p95 ms", "p99 ms", "agreement", "error"))
+    for name, (p50, p95, p99, agreement, error) in results.items():
+        print("%-12s %9.3f %9.3f %9.3f %9.1f%% %9.2f" % (name, p50, p95, p99, agreement * 100, error))
+
+
+def benchmark_allocations(frames, warmup=5, tolerance=1024, peak_tolerance=16384):
+    """
+
+    Memory allocated per frame by the detection pipeline, measured with tracemalloc.
+
+    Each configuration is warmed up first so its buffers exist, then every frame is searched with tracing on. Peak is
+    the most memory a single frame held above what was allocated before it, growth is how much more memory is held
+    after all frames than before them. A Detector is flat when it neither grows nor allocates anything image sized in
+    a frame. The module level find_rect is measured too, as the allocating baseline, and is not judged.
+
+    Parameters
+    ----------
+        frames : list
+        Frames to search
+
+        warmup : int, optional
+        Frames searched before tracing starts
+
+        tolerance : int, optional
+        Bytes of growth still counted as flat
+
+        peak_tolerance : int, optional
+        Bytes a Detector may allocate in one frame and still count as flat, well under the smallest mask buffer
+
+    Return
+    ----------
+        Dictionary of configuration name to (peak bytes per frame, growth bytes, flat), flat is None for the baseline
+
+    """
+    configurations = [
+        ("find_rect", ObjectDetection.find_rect, False),
+        ("Detector", ObjectDetection.Detector(roi=False).find, True),
+        ("Detector roi", ObjectDetection.Detector().find, True),
+        ("Detector scale 0.5", ObjectDetection.Detector(scale=0.5).find, True),
+        ("Detector lut", ObjectDetection.Detector(roi=False, segment=ObjectDetection.filter_green_lut).find, True),
+        ("Detector roi lut", ObjectDetection.Detector(segment=ObjectDetection.filter_green_lut).find, True),
+        ("Detector scale 0.5 lut",
+         ObjectDetection.Detector(scale=0.5, segment=ObjectDetection.filter_green_lut).find, True),
+    ]
+    results = {}
+
+    for name, find, judged in configurations:
+        for frame in frames[:warmup]:
+            find(frame)
+
+        peak = 0
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+
+        for frame in frames:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            find(frame)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+
+        end, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        growth = end - start
+        results[name] = (peak, growth, growth <= tolerance and peak <= peak_tolerance if judged else None)
+
+    return results
+
+
+def print_allocations(results):
+    """
+
+    Prints the results of benchmark_allocations as a table.
+
+    """
+    print("%-24s %14s %12s %6s" % ("pipeline", "peak B/frame", "growth B", "flat"))
+    for name, (peak, growth, flat) in results.items():
+        print("%-24s %14d %12d %6s" % (name, peak, growth, "-" if flat is None else "yes" if flat else "NO"))
+
+
+def pipeline_stages():
+    """
+
+    Stages of the vision pipeline measured by benchmark_pipeline.
+
+    Every stage is called with the frame, its green mask and a FrameReplay handing out the same frame, so stages that
+    read from a video input see the frame being measured.
+
+    Return
+    ----------
+        List of (name, function)
+
+    """
+    detector = ObjectDetection.Detector(scale=0.5)
+
+    return [
+        ("filter_green", lambda frame, mask, video_input: ObjectDetection.filter_green(frame)),
+        ("get_contours", lambda frame, mask, video_input: ObjectDetection.get_contours(mask)),
+        ("get_bounding_rect", lambda frame, mask, video_input: ObjectDetection.get_bounding_rect(video_input)),
+        ("get_move", lambda frame, mask, video_input: ObjectDetection.get_move(video_input)),
+        ("Detector.get_move", lambda frame, mask, video_input: detector.get_move(video_input)),
+    ]
+
+
+def benchmark_pipeline(frames, sizes=resolutions, warmup=5):
+    """
+
+    Latency, frame rate and memory allocated for each stage of the vision pipeline at each resolution.
+
+    Frames are resized to every resolution. Latency is measured first without tracing, then each stage runs once more
+    over the frames under tracemalloc to find the most memory a single call allocated. tracemalloc snapshots taken
+    around each call, while its result is still held, count the memory blocks it allocated and left allocated, the
+    image it returns among them, and the median count over the frames is kept. Temporaries a call frees before
+    returning are not counted, they show in the bytes.
+
+    Parameters
+    ----------
+        frames : list
+        Frames to search
+
+        sizes : list, optional
+        (width, height) of every resolution to measure
+
+        warmup : int, optional
+        Frames run through each stage before measuring
+
+    Return
+    ----------
+        Dictionary of "widthxheight stage" to dictionary of p50, p95, p99, fps, alloc_bytes and alloc_count
+
+    """
+    results = {}
+    # Blocks tracemalloc allocates for its own snapshots are left out of the counts
+    untraced = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+    for width, height in sizes:
+        scaled = [cv2.resize(frame, (width, height)) for frame in frames]
+        masks = [ObjectDetection.filter_green(frame) for frame in scaled]
+
+        for name, stage in pipeline_stages():
+            video_input = Camera.FrameReplay(scaled)
+            for i in range(min(warmup, len(scaled))):
+                video_input.position = i
+                stage(scaled[i], masks[i], video_input)
+
+            times = []
+            for i, frame in enumerate(scaled):
+                video_input.position = i
+                start = time.perf_counter()
+                stage(frame, masks[i], video_input)
+                times.append(time.perf_counter() - start)
+
+            allocated = 0
+            blocks = []
+            tracemalloc.start()
+            for i, frame in enumerate(scaled):
+                video_input.position = i
+                snapshot = tracemalloc.take_snapshot().filter_traces(untraced)
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                result = stage(frame, masks[i], video_input)
+                allocated = max(allocated, tracemalloc.get_traced_memory()[1] - before)
+                differences = tracemalloc.take_snapshot().filter_traces(untraced).compare_to(snapshot, "lineno")
+                blocks.append(sum(difference.count_diff for difference in differences if difference.count_diff > 0))
+                del result, snapshot, differences
+            tracemalloc.stop()
+
+            p50, p95, p99 = percentiles(times)
+            results["%dx%d %s" % (width, height, name)] = {
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                "fps": 1 / numpy.mean(times),
+                "alloc_bytes": allocated,
+                "alloc_count": int(numpy.median(blocks)),
+            }
+
+    return results
+
+
+def print_pipeline(results):
+    """
+
+    Prints the results of benchmark_pipeline as a table.
+
+    """
+    print("%-30s %9s %9s %9s %9s %12s %8s" % ("stage", "p50 ms", "p95 ms", "p99 ms", "fps", "alloc KB", "allocs"))
+    for name, result in results.items():
+        print("%-30s %9.3f %9.3f %9.3f %9.0f %12.1f %8d" % (name, result["p50"], result["p95"], result["p99"],
+                                                            result["fps"], result["alloc_bytes"] / 1024,
+                                                            result.get("alloc_count", 0)))
+
+
+def compare_pipeline(results, baseline, tolerance):
+    """
+
+    Finds stages that got slower than a saved baseline.
+
+    Parameters
+    ----------
+        results : dict
+        Results of benchmark_pipeline
+
+        baseline : dict
+        Earlier results of benchmark_pipeline, loaded from a --save file
+
+        tolerance : float
+        How many times the baseline p95 a stage may take before it counts as a regression
+
+    Return
+    ----------
+        List of (stage, baseline p95, new p95) for every regression
+
+    """
+    regressions = []
+
+    for name, result in results.items():
+        if name in baseline and result["p95"] > baseline[name]["p95"] * tolerance:
+            regressions.append((name, baseline[name]["p95"], result["p95"]))
+
+    return regressions
+
+
+def benchmark_latency(frames, seconds=10, fps=30, control="move", window=False):
+    """
+
+    Input latency of the game loop playing on a synthetic webcam.
+
+    The frames are handed out at fps through a FrameReplay wrapped in a FrameGrabber, so they are timestamped at
+    capture like webcam frames. Rounds of normal mode are played by the same scene and display code as the game, a new
+    round starting whenever one ends, and the game's latency profiler records every tick: capture to the move
+    decision, decision to the display update, and the two together.
+
+    Parameters
+    ----------
+        frames : list
+        Frames the webcam plays back
+
+        seconds : float, optional
+        Seconds of play to measure
+
+        fps : float, optional
+        Frame rate of the synthetic webcam
+
+        control : str, optional
+        Basket control of the game, "move" or "direct"
+
+        window : bool, optional
+        Whether a real window is opened, otherwise the dummy video driver is used so it runs without a display
+
+    Return
+    ----------
+        (summary, ticks, rounds)
+            summary is an OrderedDict of stage to (mean, p50, p95, p99) in milliseconds, ticks the number of ticks
+            measured and rounds the number of rounds played
+
+    """
+    if not window:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    # Imported here, since importing the game starts pygame, which the other benchmarks do not need
+    import pygame
+    import Game
+
+    Game.open_window()
+    Game.control = control
+    Game.latency = Profiler.Profiler(window=int(seconds * 120) + 1)
+    Game.webcam = Camera.FrameGrabber(Camera.FrameReplay(frames, fps)).start()
+    Game.set_vision_idle(False)
+
+    scene = Game.PlayScene(Engine.normal_mode)
+    rounds = 1
+    end = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < end:
+            pygame.event.pump()
+            next_scene = scene.update()
+            Game.present(scene)
+            if next_scene is not None:
+                scene = Game.PlayScene(Engine.normal_mode)
+                rounds += 1
+            Game.clock.tick(scene.fps)
+    finally:
+        Game.webcam.release()
+        pygame.quit()
+
+    return Game.latency.summary(), Game.latency.frames, rounds
+
+
+def print_latency(results):
+    """
+
+    Prints the results of benchmark_latency as a table.
+
+    """
+    summary, ticks, rounds = results
+    print("%-10s %9s %9s %9s %9s" % ("stage", "mean ms", "p50 ms", "p95 ms", "p99 ms"))
+    for name, (mean, p50, p95, p99) in summary.items():
+        print("%-10s %9.3f %9.3f %9.3f %9.3f" % (name, mean, p50, p95, p99))
+    print("%d ticks over %d rounds" % (ticks, rounds))
+
+
+def main():
+    """
+
+    Command line entry point.
+
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks for the Fruit Catcher vision pipeline")
+    parser.add_argument("benchmark", nargs="?", default="pipeline",
+                        choices=["pipeline", "scales", "segmentation", "allocations", "backends", "latency"])
+    parser.add_argument("--video", help="video file to read frames from instead of generating them")
+    parser.add_argument("--frames", type=int, default=120, help="number of frames to use")
+    parser.add_argument("--width", type=int, default=1280, help="width of generated frames")
+    parser.add_argument("--height", type=int, default=720, help="height of generated frames")
+    parser.add_argument("--refine", action="store_true", help="refine downscaled results at full resolution")
+    parser.add_argument("--save", help="json file to write pipeline results to")
+    parser.add_argument("--compare", help="json file of earlier pipeline results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed p95 slowdown against --compare")
+    parser.add_argument("--seconds", type=float, default=10, help="seconds of play the latency benchmark measures")
+    parser.add_argument("--fps", type=float, default=30, help="frame rate of the latency benchmark's webcam")
+    parser.add_argument("--control", default="move", choices=["move", "direct"], help="basket control of the game")
+    parser.add_argument("--window", action="store_true", help="open a real window for the latency benchmark")
+    parser.add_argument("--max-latency", type=float, help="most p95 capture to display milliseconds allowed")
+    args = parser.parse_args()
+
+    if args.video:
+        frames = video_frames(args.video, args.frames)
+    else:
+        frames = synthetic_frames(args.frames, args.width, args.height)
+
+    if args.benchmark == "pipeline":
+        results = benchmark_pipeline(frames)
+        print_pipeline(results)
+
+        if args.save:
+            with open(args.save, "w") as file:
+                json.dump(results, file, indent=2)
+
+        if args.compare:
+            with open(args.compare) as file:
+                regressions = compare_pipeline(results, json.load(file), args.tolerance)
+            for name, before, after in regressions:
+                print("REGRESSION %s: p95 %.3f ms -> %.3f ms" % (name, before, after))
+            if regressions:
+                sys.exit(1)
+    elif args.benchmark == "scales":
+        print_scales(benchmark_scales(frames, refine=args.refine))
+    elif args.benchmark == "segmentation":
+        results = benchmark_segmentation(frames)
+        print_segmentation(results)
+        failures = check_segmentation(results)
+        for name, mismatch, noise in failures:
+            print("MISMATCH %s: %.3f%% of frames, %.3f%% of noise" % (name, mismatch * 100, noise * 100))
+        if failures:
+            sys.exit(1)
+    elif args.benchmark == "backends":
+        print_backends(benchmark_backends(frames))
+    elif args.benchmark == "latency":
+        results = benchmark_latency(frames, args.seconds, args.fps, args.control, args.window)
+        print_latency(results)
+
+        if args.save:
+            with open(args.save, "w") as file:
+                json.dump(results[0], file, indent=2)
+
+        total = results[0].get("latency")
+        if total is None:
+            print("NO INPUT: the marker was never tracked")
+            sys.exit(1)
+        if args.max_latency is not None and total[2] > args.max_latency:
+            print("OVER BUDGET: p95 latency %.3f ms > %.3f ms" % (total[2], args.max_latency))
+            sys.exit(1)
+    elif args.benchmark == "allocations":
+        results = benchmark_allocations(frames)
+        print_allocations(results)
+        if not all(flat for _, _, flat in results.values() if flat is not None):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+"""Fruit Catcher Camera | Camera.py
+
+This file is responsible for getting frames from the webcam. The webcam is opened with the capture backend of the
+platform and asked for a small, fast stream suited to tracking, and what the driver actually granted is read back.
+Frames are read on a background thread so that the game loop never has to wait on the camera. The Game file wraps its
+webcam in a FrameGrabber and hands it to ObjectDetection. A CaptureTuner steps the stream down to a cheaper mode when
+vision takes longer than its budget. FrameReplay plays back recorded or generated frames where there is no camera.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Capture backend of each platform, DirectShow only exists on Windows
+backends = {"linux": cv2.CAP_V4L2, "win32": cv2.CAP_DSHOW, "darwin": cv2.CAP_AVFOUNDATION}
+
+# Capture modes as (width, height, fps), from the one asked for first to the cheapest a CaptureTuner steps down to
+capture_modes = [(640, 480, 30), (320, 240, 30), (160, 120, 30)]
+
+# Pixel format asked for, compressed MJPG lets USB webcams send full frame rates at any of the capture modes
+pixel_format = "MJPG"
+
+
+def default_backend(platform=None):
+    """
+
+    Capture backend to open the webcam with on a platform.
+
+    Parameters
+    ----------
+        platform : str, optional
+        Value of sys.platform, the running platform when not given
+
+    Return
+    ----------
+        cv2 capture backend, cv2.CAP_ANY on platforms without a preferred one
+
+    """
+    platform = sys.platform if platform is None else platform
+    for prefix, backend in backends.items():
+        if platform.startswith(prefix):
+            return backend
+    return cv2.CAP_ANY
+
+
+def open_camera(source=0, mode=capture_modes[0], fourcc=pixel_format, api_preference=None):
+    """
+
+    Opens the webcam and asks for a capture mode.
+
+    When the platform's backend can not open the webcam, any backend cv2 has is tried instead.
+
+    Parameters
+    ----------
+        source : int, optional
+        Index of webcam to open
+
+        mode : tuple, optional
+        (width, height, fps) to ask for
+
+        fourcc : str, optional
+        Four character code of the pixel format to ask for
+
+        api_preference : int, optional
+        cv2 capture backend, default_backend() when not given
+
+    Return
+    ----------
+        The cv2.VideoCapture
+
+    """
+    api_preference = default_backend() if api_preference is None else api_preference
+    video_input = cv2.VideoCapture(source, api_preference)
+    if not video_input.isOpened() and api_preference != cv2.CAP_ANY:
+        video_input = cv2.VideoCapture(source, cv2.CAP_ANY)
+
+    if video_input.isOpened():
+        configure(video_input, mode, fourcc)
+    return video_input
+
+
+def configure(video_input, mode, fourcc=pixel_format):
+    """
+
+    Asks an open webcam for a capture mode.
+
+    The pixel format is set first, since V4L2 drivers only offer some sizes and frame rates in some formats. The driver
+    buffer is kept to one frame where the backend allows it, so a slow reader gets the newest frame and not a queued
+    one. Drivers are free to pick the closest mode they have, so the granted mode is read back.
+
+    Parameters
+    ----------
+        video_input : video input from webcam
+        The cv2.VideoCapture to configure
+
+        mode : tuple
+        (width, height, fps) to ask for
+
+        fourcc : str, optional
+        Four character code of the pixel format to ask for
+
+    Return
+    ----------
+        The granted mode, same as granted
+
+    Cites
+    ----------
+    https://docs.opencv.org/4.x/d4/d15/group__videoio__flags__base.html
+
+    """
+    width, height, fps = mode
+    if fourcc:
+        video_input.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    video_input.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    video_input.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    video_input.set(cv2.CAP_PROP_FPS, fps)
+    video_input.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return granted(video_input)
+
+
+def granted(video_input):
+    """
+
+    Capture mode the webcam is actually running in.
+
+    Parameters
+    ----------
+        video_input : video input from webcam
+        The cv2.VideoCapture to ask
+
+    Return
+    ----------
+        (width, height, fps, fourcc), fourcc is an empty string when the backend does not report it
+
+    """
+    code = int(video_input.get(cv2.CAP_PROP_FOURCC))
+    fourcc = "".join(chr((code >> shift) & 0xFF) for shift in (0, 8, 16, 24)).strip("\0 ")
+    return (int(video_input.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video_input.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            video_input.get(cv2.CAP_PROP_FPS), fourcc)
+
+
+class FrameGrabber(object):
+    """
+
+    Background webcam reader.
+
+    A dedicated thread keeps reading from the video input and stores only the newest frame. Older frames are dropped
+    as soon as a newer one arrives, they are never queued. The read method has the same shape as cv2.VideoCapture.read
+    so the grabber can be passed anywhere the raw webcam was used before.
+
+    While paused the thread sleeps instead of reading, so no frames are decoded when nothing needs them.
+
+    Attributes
+    ----------
+    video_input : video input from webcam
+    The cv2.VideoCapture the frames are read from
+
+    frame_id : int
+    Number of frames captured so far
+
+    timestamp : float
+    time.perf_counter() value when the newest frame was captured
+
+    last_age : float
+    Age in seconds of the frame handed out by the latest read call
+
+    active : threading.Event
+    Set while frames are being read, cleared by pause
+
+    mode : tuple
+    (width, height, fps, fourcc) the webcam was last granted, None before it was configured through the grabber
+
+    Cites
+    ----------
+    https://docs.python.org/3/library/threading.html
+
+    """
+
+    def __init__(self, video_input):
+        """
+
+        FrameGrabber object constructor
+
+        Parameters
+        ----------
+            video_input : video input from webcam
+            The cv2.VideoCapture to read frames from
+
+        """
+        self.video_input = video_input
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.active = threading.Event()
+        self.active.set()
+        self.pending = None
+        self.mode = None
+        self.frame = None
+        self.frame_id = 0
+        self.timestamp = 0.0
+        self.last_age = 0.0
+
+    def start(self):
+        """
+
+        Starts the capture thread.
+
+        Return
+        ----------
+            self, so the grabber can be made and started in one line
+
+        """
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.update, name="FrameGrabber", daemon=True)
+            self.thread.start()
+        return self
+
+    def update(self):
+        """
+
+        Capture loop run by the background thread.
+
+        Blocks on the camera and replaces the stored frame with each new one, or sleeps while paused.
+
+        """
+        while self.running:
+            self.active.wait()
+            if not self.running:
+                break
+            if self.pending is not None:
+                mode, fourcc = self.pending
+                self.pending = None
+                self.mode = configure(self.video_input, mode, fourcc)
+            ok, frame = self.video_input.read()
+            if not ok:
+                time.sleep(0.005)
+                continue
+            with self.lock:
+                self.frame = frame
+                self.frame_id += 1
+                self.timestamp = time.perf_counter()
+
+    def read(self):
+        """
+
+        Gets the newest frame without blocking.
+
+        The return value has the same shape as cv2.VideoCapture.read so callers do not need to know which one they
+        were given.
+
+        Return
+        ----------
+            (ok, frame)
+                ok is False until the first frame has been captured
+
+        """
+        with self.lock:
+            frame = self.frame
+            timestamp = self.timestamp
+        if frame is None:
+            return False, None
+        self.last_age = time.perf_counter() - timestamp
+        return True, frame
+
+    def frame_age(self):
+        """
+
+        Age of the newest captured frame.
+
+        Return
+        ----------
+            Seconds since the newest frame was captured, or None before the first frame
+
+        """
+        with self.lock:
+            if self.frame is None:
+                return None
+            return time.perf_counter() - self.timestamp
+
+    def configure(self, mode, fourcc=pixel_format):
+        """
+
+        Asks the webcam for a capture mode, like the configure function.
+
+        The mode is set by the capture thread before its next read, since the webcam can not be changed while it is
+        being read from. The granted mode is left in the mode attribute.
+
+        Parameters
+        ----------
+            mode : tuple
+            (width, height, fps) to ask for
+
+            fourcc : str, optional
+            Four character code of the pixel format to ask for
+
+        """
+        self.pending = (mode, fourcc)
+
+    def pause(self):
+        """
+
+        Stops reading frames until resume, the thread sleeps in the meantime.
+
+        """
+        self.active.clear()
+
+    def resume(self):
+        """
+
+        Starts reading frames again after pause.
+
+        """
+        self.active.set()
+
+    def stop(self):
+        """
+
+        Stops the capture thread and waits for it to finish.
+
+        """
+        self.running = False
+        self.active.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def release(self):
+        """
+
+        Stops the capture thread and releases the webcam.
+
+        """
+        self.stop()
+        self.video_input.release()
+
+
+class FrameReplay(object):
+    """
+
+    Video input that plays back a list of frames.
+
+    Stands in for the webcam where there is no camera, for example in benchmarks on a headless machine. Frames are
+    handed out in order and playback starts over after the last one. With a frame rate, read blocks until the next
+    frame is due like a webcam does, so a FrameGrabber around it sees frames arrive at a webcam's pace.
+
+    Attributes
+    ----------
+    frames : list
+    Frames to play back
+
+    position : int
+    Index of the next frame to hand out
+
+    fps : float
+    Frames handed out per second, None hands them out as fast as they are read
+
+    """
+
+    def __init__(self, frames, fps=None):
+        """
+
+        FrameReplay object constructor
+
+        Parameters
+        ----------
+            frames : list
+            Frames to play back
+
+            fps : float, optional
+            Frames handed out per second, None hands them out as fast as they are read
+
+        """
+        self.frames = frames
+        self.position = 0
+        self.fps = fps
+        self.due = None
+
+    def read(self):
+        """
+
+        Gets the next frame, same return value as cv2.VideoCapture.read.
+
+        """
+        if not self.frames:
+            return False, None
+
+        if self.fps:
+            now = time.perf_counter()
+            self.due = now if self.due is None else max(self.due + 1.0 / self.fps, now - 1.0 / self.fps)
+            if self.due > now:
+                time.sleep(self.due - now)
+        frame = self.frames[self.position]
+        self.position = (self.position + 1) % len(self.frames)
+        return True, frame
+
+    def pause(self):
+        """
+
+        Nothing to pause, taken so a FrameReplay can be used like a FrameGrabber.
+
+        """
+        pass
+
+    def resume(self):
+        """
+
+        Nothing to resume, taken so a FrameReplay can be used like a FrameGrabber.
+
+        """
+        pass
+
+    def release(self):
+        """
+
+        Nothing to release, taken so a FrameReplay can be used like a webcam.
+
+        """
+        pass
+
+
+class CaptureTuner(object):
+    """
+
+    Steps the webcam down to cheaper capture modes when vision is over budget.
+
+    The time vision took on each frame is reported through update. Once the mean over a full window of frames is over
+    the budget, the next mode of modes is asked for and the window starts over, so the new mode is judged on its own
+    frames. Modes are never stepped back up, a stream that was too slow once is likely to be again.
+
+    Attributes
+    ----------
+    video_input : video input from webcam
+    A cv2.VideoCapture, configured directly, or a FrameGrabber, configured by its capture thread
+
+    budget : float
+    Most seconds vision may take per frame on average
+
+    modes : list
+    Capture modes as (width, height, fps), from the current one to the cheapest
+
+    level : int
+    Index in modes of the mode last asked for
+
+    times : deque
+    Seconds vision took on each frame of the window
+
+    """
+
+    def __init__(self, video_input, budget=0.008, modes=capture_modes, fourcc=pixel_format, window=30):
+        """
+
+        CaptureTuner object constructor
+
+        Parameters
+        ----------
+            video_input : video input from webcam
+            A cv2.VideoCapture or a FrameGrabber, already set to the first of modes
+
+            budget : float, optional
+            Most seconds vision may take per frame on average
+
+            modes : list, optional
+            Capture modes as (width, height, fps), from the current one to the cheapest
+
+            fourcc : str, optional
+            Four character code of the pixel format to ask for
+
+            window : int, optional
+            Number of frames averaged before stepping down
+
+        """
+        self.video_input = video_input
+        self.budget = budget
+        self.modes = modes
+        self.fourcc = fourcc
+        self.level = 0
+        self.times = deque(maxlen=window)
+
+    def update(self, seconds):
+        """
+
+        Reports the time vision took on a frame, stepping down when the window is over budget.
+
+        Parameters
+        ----------
+            seconds : float
+            Seconds vision took on the frame
+
+        Return
+        ----------
+            True when a cheaper mode was asked for
+
+        """
+        self.times.append(seconds)
+        if len(self.times) < self.times.maxlen or self.level + 1 >= len(self.modes):
+            return False
+        if sum(self.times) <= self.budget * len(self.times):
+            return False
+
+        self.level += 1
+        self.times.clear()
+        if isinstance(self.video_input, FrameGrabber):
+            self.video_input.configure(self.modes[self.level], self.fourcc)
+        else:
+            configure(self.video_input, self.modes[self.level], self.fourcc)
+        return True
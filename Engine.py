@@ -0,0 +1,1155 @@
+"""Fruit Catcher Engine | Engine.py
+
+This file is responsible for the game rules: spawning fruits, moving fruits and the basket, catching, scoring and lives.
+Nothing here uses pygame or the webcam. The Game file draws what a Round holds, and the same rules can run headless,
+driven by scripted or random input, as fast as the machine allows.
+
+Usage
+-----
+    python Engine.py --mode hard --frames 100000 --input chase
+    python Engine.py --mode stress --frames 10000 --input chase --memory
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+import numpy
+
+# PLAYING FIELD
+display_width = 500
+display_height = 800
+
+# BASKET MOVES
+LEFT = 1
+RIGHT = 2
+
+
+class Mode(object):
+    """
+
+
+    Game mode settings
+
+    Attributes
+    ----------
+    name : str
+    Name of mode
+
+    add_fruit_rate : int
+    Frames between new fruits
+
+    fruit_speed : float
+    Share of a fruit's vel it falls each frame
+
+    basket_speed : float
+    Share of the basket's vel it moves each frame
+
+    flipped : bool
+    Whether the basket moves the opposite way to the marker
+
+    """
+
+    def __init__(self, name, add_fruit_rate, fruit_speed, basket_speed, flipped):
+        """
+
+
+        Mode object constructor
+
+        Parameters
+        ----------
+        name : str
+        Name of mode
+
+        add_fruit_rate : int
+        Frames between new fruits
+
+        fruit_speed : float
+        Share of a fruit's vel it falls each frame
+
+        basket_speed : float
+        Share of the basket's vel it moves each frame
+
+        flipped : bool
+        Whether the basket moves the opposite way to the marker
+
+        """
+        self.name = name
+        self.add_fruit_rate = add_fruit_rate
+        self.fruit_speed = fruit_speed
+        self.basket_speed = basket_speed
+        self.flipped = flipped
+
+
+normal_mode = Mode("normal", 75, .5, .3, False)
+hard_mode = Mode("hard", 45, 1.13, 1, True)
+# A fruit every frame, keeps well over a hundred fruits falling for load testing
+stress_mode = Mode("stress", 1, .5, .3, False)
+modes = {"normal": normal_mode, "hard": hard_mode, "stress": stress_mode}
+
+
+class Basket(object):
+    """
+
+
+    Basket Class
+
+    Slotted, so a basket has no per-instance __dict__, and its rects are lists moved in place instead of new tuples
+    every frame. Rects are [x, y, width, height].
+
+    Attributes
+    ----------
+    x : float
+    x position of basket
+
+    y : float
+    y position of basket
+
+    vel : int
+    Speed of basket
+
+    hitbox : list
+    Rect around basket
+
+    mouth : list
+    Rect of the opening a fruit's bottom edge has to fall into to be caught
+
+    mouth_offset : tuple
+    Position of the mouth from the basket's position, and its size
+
+    Methods
+    ----------
+    update_hitbox()
+        moves the hitbox and mouth to the basket's position
+
+    Cites
+    -----
+    https://www.tutorialspoint.com/What-is-difference-between-self-and-init-methods-in-python-Class
+        used to help understand Python coding again
+    https://docs.python.org/3/reference/datamodel.html#slots
+    """
+
+    __slots__ = ("x", "y", "hitbox", "mouth")
+    vel = 10
+    mouth_offset = (10, 70, 80, 30)
+
+    def __init__(self, x, y):
+        """
+
+
+        Basket object constructor
+
+        Parameters
+        ----------
+        x : float
+        x position of basket
+
+        y : float
+        y position of basket
+
+        """
+        self.x = x
+        self.y = y
+        self.hitbox = [x, y + 20, 125, 130]
+        self.mouth = [x + self.mouth_offset[0], y + self.mouth_offset[1], self.mouth_offset[2], self.mouth_offset[3]]
+
+    def update_hitbox(self):
+        """
+
+
+        Moving the hitbox and mouth to the basket's position
+
+        """
+        self.hitbox[0] = self.x
+        self.hitbox[1] = self.y + 20
+        self.mouth[0] = self.x + self.mouth_offset[0]
+        self.mouth[1] = self.y + self.mouth_offset[1]
+
+
+class FruitType(object):
+    """
+
+
+    Fruit type, shared by every fruit of the type
+
+    A falling fruit is only its position and an index into fruit_types, kept in a FruitStore. Everything that is the
+    same for all fruits of a type lives once here.
+
+    Attributes
+    ----------
+    name : str
+    Name of fruit
+
+    image : str
+    Image file of fruit
+
+    points : int
+    Points worth of fruit
+
+    size : tuple
+    Tuple of integer values for width and height of fruit sprite
+
+    vel : int
+    Speed of fruit
+
+    Cites
+    ----------
+    https://en.wikipedia.org/wiki/Flyweight_pattern
+
+    """
+
+    __slots__ = ("name", "image", "points", "size", "vel")
+
+    def __init__(self, name, image, points, size=(100, 100), vel=10):
+        """
+
+
+        FruitType object constructor
+
+        Parameters
+        ----------
+        name : str
+        Name of fruit
+
+        image : str
+        Image file of fruit
+
+        points : int
+        Points worth of fruit
+
+        size : tuple, optional
+        Tuple of integer values for width and height of fruit sprite
+
+        vel : int, optional
+        Speed of fruit
+
+        """
+        self.name = name
+        self.image = image
+        self.points = points
+        self.size = size
+        self.vel = vel
+
+
+strawberry = FruitType("strawberry", 'strawberry.png', 1)
+apple = FruitType("apple", 'apple.png', 2)
+pineapple = FruitType("pineapple", 'pineapple.png', 3)
+fruit_types = [strawberry, apple, pineapple]
+
+
+class FruitStore(object):
+    """
+
+
+    Falling fruits, stored as one NumPy array per attribute
+
+    Fruit i is x[i], y[i], vel[i], kind[i] and points[i], for i below count, with kind indexing fruit_types. Keeping
+    the fruits in arrays lets a Round move and test all of them with a few array operations instead of a Python loop,
+    so hundreds of fruits cost about the same per frame as a handful. Removed fruits are compacted out with a mask,
+    which keeps the rest in order. The arrays double in size whenever they are full.
+
+    Fruits are kept sorted by y, lowest on screen first. New fruits spawn at the top and all fruits fall at the same
+    speed, so spawning keeps the order for free, and the store only sorts itself again when fruits were added out of
+    order or fall at different speeds. Sorted fruits let collision tests find the fruits in a band of the screen with
+    a binary search, see band.
+
+    Slots past count hold NaN positions, so falling runs over the whole arrays and writes into a scratch array kept
+    here, and a frame makes no new arrays for it.
+
+    Attributes
+    ----------
+    count : int
+    Number of fruits stored
+
+    x : numpy.ndarray
+    x position of each fruit
+
+    y : numpy.ndarray
+    y position of each fruit
+
+    hit_y : numpy.ndarray
+    y position of each fruit's hitbox, where the fruit was at the start of the frame
+
+    vel : numpy.ndarray
+    Speed of each fruit
+
+    kind : numpy.ndarray
+    Index into fruit_types of each fruit
+
+    points : numpy.ndarray
+    Points worth of each fruit
+
+    width : numpy.ndarray
+    Width of each fruit's hitbox
+
+    height : numpy.ndarray
+    Height of each fruit's hitbox
+
+    tallest : int
+    Greatest height of any fruit added
+
+    fastest : float
+    Greatest vel of any fruit added
+
+    longest_fall : float
+    Greatest distance a fruit may have fallen in the last frame, from the fastest fruit added
+
+    ordered : bool
+    Whether the fruits are sorted by y
+
+    step : numpy.ndarray
+    Scratch array for how far each fruit falls
+
+    caught, removed : numpy.ndarray
+    Scratch boolean arrays for collision tests
+
+    Methods
+    ----------
+    add(kind, x, y)
+        adds a fruit of type fruit_types[kind]
+    fall(speed)
+        moves every fruit down
+    sort()
+        sorts the fruits by y if they are out of order
+    remove(mask)
+        drops the fruits where mask is True
+    items()
+        gives (fruit type, x, y) of every fruit
+
+    Cites
+    -----
+    https://numpy.org/doc/stable/user/basics.indexing.html#boolean-array-indexing
+        used for removing with masks
+    https://en.wikipedia.org/wiki/Sweep_and_prune
+    """
+
+    def __init__(self, capacity=64):
+        """
+
+
+        FruitStore object constructor
+
+        Parameters
+        ----------
+        capacity : int, optional
+        Number of fruits there is room for before the arrays grow
+
+        """
+        self.count = 0
+        self.x = numpy.full(capacity, numpy.nan)
+        self.y = numpy.full(capacity, numpy.nan)
+        self.hit_y = numpy.full(capacity, numpy.nan)
+        self.vel = numpy.zeros(capacity)
+        self.kind = numpy.zeros(capacity, numpy.intp)
+        self.points = numpy.zeros(capacity, numpy.intp)
+        self.width = numpy.zeros(capacity)
+        self.height = numpy.zeros(capacity)
+        self.tallest = 0
+        self.fastest = 0
+        self.longest_fall = 0.0
+        self.ordered = True
+        self.mixed = False
+        self.step = numpy.zeros(capacity)
+        self.caught = numpy.zeros(capacity, bool)
+        self.removed = numpy.zeros(capacity, bool)
+
+    def __len__(self):
+        return self.count
+
+    def arrays(self):
+        """
+
+
+        Every attribute array, in the order they are stored
+
+        """
+        return [self.x, self.y, self.hit_y, self.vel, self.kind, self.points, self.width, self.height]
+
+    def add(self, kind, x, y):
+        """
+
+
+        Adding a fruit
+
+        Parameters
+        ----------
+        kind : int
+        Index into fruit_types of the fruit
+
+        x : float
+        x position of fruit
+
+        y : float
+        y position of fruit
+
+        """
+        if self.count == len(self.x):
+            self.x, self.y, self.hit_y, self.vel, self.kind, self.points, self.width, self.height = [
+                numpy.concatenate((array, numpy.full_like(array, numpy.nan if array.dtype.kind == "f" else 0)))
+                for array in self.arrays()]
+            self.step, self.caught, self.removed = [
+                numpy.zeros_like(array, shape=2 * len(array)) for array in (self.step, self.caught, self.removed)]
+
+        i = self.count
+        fruit_type = fruit_types[kind]
+        if i:
+            self.ordered = self.ordered and y <= self.y[i - 1]
+            self.mixed = self.mixed or fruit_type.vel != self.vel[i - 1]
+
+        self.x[i] = x
+        self.y[i] = y
+        self.hit_y[i] = y
+        self.vel[i] = fruit_type.vel
+        self.kind[i] = kind
+        self.points[i] = fruit_type.points
+        self.width[i], self.height[i] = fruit_type.size
+        self.tallest = max(self.tallest, fruit_type.size[1])
+        self.fastest = max(self.fastest, fruit_type.vel)
+        self.count += 1
+
+    def fall(self, speed):
+        """
+
+
+        Moving every fruit down, the hitbox is left where the fruit was at the start of the frame
+
+        Parameters
+        ----------
+        speed : float
+        Share of a fruit's vel it falls
+
+        """
+        numpy.copyto(self.hit_y, self.y)
+        self.y += numpy.multiply(self.vel, speed, out=self.step)
+        self.longest_fall = self.fastest * speed
+        if self.mixed:
+            self.ordered = False
+
+    def sort(self):
+        """
+
+
+        Sorting the fruits by y, lowest on screen first, if they are out of order
+
+        Fruits at the same height keep their order.
+        """
+        if self.ordered:
+            return
+
+        n = self.count
+        order = numpy.argsort(-self.y[:n], kind="stable")
+        for array in self.arrays():
+            array[:n] = array[:n][order]
+        self.ordered = True
+
+    def remove(self, mask):
+        """
+
+
+        Dropping of fruits, keeping the order of the rest
+
+        Parameters
+        ----------
+        mask : numpy.ndarray
+        Boolean array, True for the fruits to drop, only the first count values are read
+
+        """
+        n = self.count
+        dropped = int(numpy.count_nonzero(mask[:n]))
+        if not dropped:
+            return
+
+        kept = n - dropped
+        if numpy.count_nonzero(mask[:dropped]) == dropped:
+            # Only the lowest fruits, the usual case, so the rest just shift down
+            for array in self.arrays():
+                array[:kept] = array[dropped:n]
+        else:
+            keep = ~mask[:n]
+            for array in self.arrays():
+                array[:kept] = array[:n][keep]
+        self.x[kept:n] = self.y[kept:n] = self.hit_y[kept:n] = numpy.nan
+        self.count = kept
+        if not kept:
+            self.mixed = False
+
+    def items(self, alpha=1.0):
+        """
+
+
+        Every fruit, for drawing
+
+        Parameters
+        ----------
+        alpha : float, optional
+        Share of the last fall to draw fruits at, 0 draws them where the frame started and 1 where it ended
+
+        Return
+        ----------
+            Iterator of (fruit type, x, y)
+
+        """
+        n = self.count
+        y = self.y[:n]
+        if alpha != 1:
+            y = self.hit_y[:n] + (y - self.hit_y[:n]) * alpha
+        return zip([fruit_types[kind] for kind in self.kind[:n].tolist()], self.x[:n].tolist(), y.tolist())
+
+
+def count_above(values, count, limit, inclusive=False):
+    """
+
+
+    Number of values above a limit, by binary search
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+    Values sorted from highest to lowest
+
+    count : int
+    Number of values to search
+
+    limit : float
+    Limit to compare against
+
+    inclusive : bool, optional
+    Whether values equal to limit are counted
+
+    Return
+    ----------
+        Index of the first value below limit, or at it when not inclusive
+
+    """
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        value = values[middle]
+        if value > limit or (inclusive and value == limit):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def band(values, count, top, bottom):
+    """
+
+
+    Broadphase, the fruits in a horizontal band of the screen
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+    y values of the fruits, sorted from lowest on screen to highest
+
+    count : int
+    Number of fruits
+
+    top : float
+    Smallest y in the band
+
+    bottom : float
+    Greatest y in the band
+
+    Return
+    ----------
+        (start, stop), the fruits in the band are start up to but not including stop
+
+    """
+    return count_above(values, count, bottom), count_above(values, count, top, inclusive=True)
+
+
+def catch(fruits, mouth, caught):
+    """
+
+
+    Marking the fruits that fell into a basket's mouth
+
+    A fruit is caught when the bottom edge of its hitbox is inside the mouth and its hitbox overlaps the mouth
+    sideways. Only the fruits in the band that could reach the mouth are tested. Fruits are sorted by y and not by
+    hitbox, which can be in a different order when fruits fall at different speeds, so the band is searched on y and
+    widened by the longest fall of the frame.
+
+    Parameters
+    ----------
+    fruits : FruitStore
+    Fruits to test, sorted by y
+
+    mouth : list
+    Rect of the basket's mouth
+
+    caught : numpy.ndarray
+    Boolean array the caught fruits are marked True in
+
+    """
+    left, top, width, height = mouth
+    start, stop = band(fruits.y, fruits.count, top - fruits.tallest, top + height + fruits.longest_fall)
+    if start == stop:
+        return
+
+    x = fruits.x[start:stop]
+    bottom = fruits.hit_y[start:stop] + fruits.height[start:stop]
+    caught[start:stop] |= ((x <= left + width) & (x + fruits.width[start:stop] >= left) &
+                           (bottom >= top) & (bottom <= top + height))
+
+
+class Round(object):
+    """
+
+
+    One round of the game
+
+    Holds the basket, the falling fruits, score and lives, and advances them one frame at a time. Random fruits
+    (apples, strawberries, pineapples) are generated every add_fruit_rate frames. When fruit hits basket, it is removed
+    and its points are added to the score. When fruit hits the floor, it is removed and a life is lost, and with no
+    lives left the round is over.
+
+    Attributes
+    ----------
+    mode : Mode
+    Settings of the mode being played
+
+    scores : int
+    Score of player
+
+    lives : int
+    Lives of player
+
+    fruits : FruitStore
+    Fruits falling
+
+    basket : Basket
+    Basket of player
+
+    game_over : bool
+    Whether the round is lost
+
+    frames : int
+    Number of frames played
+
+    Cites
+    -----
+    https://codereview.stackexchange.com/questions/73847/simple-random-falling-object-animation-in-java
+        used as example when making falling code in Python
+    https://stackoverflow.com/questions/20102075/move-car-horizontal-python-classes
+        used for basket movement
+    https://www.youtube.com/playlist?list=PLlEgNdBJEO-lwI_F15DAQmgmqh5E7OYt_
+        used for collisions and walls
+    https://www.youtube.com/watch?v=K9qMm3JbOH0
+        used for hitboxes and movement
+    """
+
+    def __init__(self, mode, width=display_width, height=display_height, rng=random):
+        """
+
+
+        Round object constructor
+
+        Parameters
+        ----------
+        mode : Mode
+        Settings of the mode to play
+
+        width : int, optional
+        Width of playing field
+
+        height : int, optional
+        Height of playing field
+
+        rng : random.Random, optional
+        Source of random numbers, seed one for repeatable rounds
+
+        """
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.random = rng
+        self.scores = 0
+        self.lives = 3
+        self.fruits = FruitStore()
+        self.fruit_counter = 0
+        self.basket = Basket(width * 0.35, height - 160)
+        self.game_over = False
+        self.frames = 0
+
+    def move_basket(self, direction):
+        """
+
+
+        Moving of basket
+
+        Parameters
+        ----------
+        direction : int
+        Move value from ObjectDetection.get_move, 1 and 2 are swapped in flipped modes
+
+        Return
+        ----------
+            True when the basket moved
+
+        """
+        basket = self.basket
+        left, right = (RIGHT, LEFT) if self.mode.flipped else (LEFT, RIGHT)
+        step = self.mode.basket_speed * basket.vel
+
+        if direction == left and basket.x > basket.vel - 5:
+            basket.x -= step
+        elif direction == right and basket.x < self.width - 150 - basket.vel:
+            basket.x += step
+        else:
+            return False
+
+        basket.update_hitbox()
+        return True
+
+    def steer(self, position):
+        """
+
+
+        Placing the basket straight at the marker's position
+
+        The marker's position across the camera image maps onto the basket's range of movement, so the basket follows
+        the marker without moving a set speed per frame. The camera image is mirrored, so the marker at the right of it
+        puts the basket at the left, and flipped modes map it the other way round.
+
+        Parameters
+        ----------
+        position : float
+        Marker position from ObjectDetection.Tracker.get_position, 0 at the left edge of the camera image and 1 at the
+        right edge
+
+        Return
+        ----------
+            True when the basket moved
+
+        """
+        basket = self.basket
+        left = basket.vel - 5
+        right = self.width - 150 - basket.vel
+        share = min(max(position, 0.0), 1.0)
+        if not self.mode.flipped:
+            share = 1.0 - share
+        x = left + share * (right - left)
+
+        if x == basket.x:
+            return False
+
+        basket.x = x
+        basket.update_hitbox()
+        return True
+
+    def spawn(self):
+        """
+
+
+        Adding a random fruit every add_fruit_rate frames
+
+        """
+        self.fruit_counter += 1
+
+        if self.fruit_counter == self.mode.add_fruit_rate:
+            self.fruit_counter = 0
+            f_startx = self.random.randrange(100, self.width - 100)
+            f_type = self.random.randrange(0, len(fruit_types))
+            self.fruits.add(f_type, f_startx, 0)
+
+    def fall(self):
+        """
+
+
+        Moving fruits down, the hitbox is left where the fruit was at the start of the frame
+
+        """
+        self.fruits.fall(self.mode.fruit_speed)
+
+    def collide(self):
+        """
+
+
+        Catching fruits in the basket and losing lives for fruits hitting the floor
+
+        Only the fruits near the basket's mouth and near the floor are tested, found with a binary search over the
+        sorted fruits. A fruit in the basket is caught even if it is also on the floor. Fruits on the floor each take a
+        life, lowest first, and the one that would take the last life is left on the floor and ends the round. Fruits
+        that fall past the floor without hitting it are dropped so they are not kept forever.
+        """
+        fruits = self.fruits
+        n = len(fruits)
+        if not n:
+            return
+
+        fruits.sort()
+        caught = fruits.caught
+        caught.fill(False)
+        catch(fruits, self.basket.mouth, caught)
+
+        removed = fruits.removed
+        removed.fill(False)
+        removed[:count_above(fruits.y, n, self.height + 100)] = True
+
+        start, stop = band(fruits.y, n, self.height - 50, self.height - 40)
+        if start < stop:
+            floor_hits = numpy.flatnonzero(~caught[start:stop]) + start
+            lost = min(len(floor_hits), max(self.lives - 1, 0))
+            if lost < len(floor_hits):
+                self.game_over = True
+            self.lives -= lost
+            removed[floor_hits[:lost]] = True
+
+        if numpy.count_nonzero(caught):
+            self.scores += int(fruits.points[caught].sum())
+            removed |= caught
+        if numpy.count_nonzero(removed):
+            fruits.remove(removed)
+
+    def step(self, direction, position=None):
+        """
+
+
+        Advancing the round by one frame
+
+        Parameters
+        ----------
+        direction : int
+        Move value from ObjectDetection.get_move
+
+        position : float, optional
+        Marker position the basket is placed at instead of moved by direction, see steer
+
+        Return
+        ----------
+            True when the basket moved
+
+        """
+        if self.game_over:
+            return False
+
+        moved = self.move_basket(direction) if position is None else self.steer(position)
+        self.spawn()
+        self.fall()
+        self.collide()
+        self.frames += 1
+        return moved
+
+
+class Timestep(object):
+    """
+
+
+    Fixed timestep accumulator
+
+    Rounds are played in frames of a fixed length of time, whatever rate the game loop runs at. Each loop adds the real
+    time that passed and is told how many frames to play, so a slow loop plays several frames at once and the game
+    keeps real-time speed. What is left over is less than a frame, and alpha gives it as a share of a frame, for
+    drawing between the last two frames.
+
+    Attributes
+    ----------
+    dt : float
+    Seconds per frame
+
+    max_steps : int
+    Most frames played for one call of advance, time beyond that is dropped so a long stall does not lead to a burst
+
+    accumulator : float
+    Seconds passed that have not been played yet
+
+    dropped : int
+    Number of frames dropped so far
+
+    Cites
+    -----
+    https://gafferongames.com/post/fix_your_timestep/
+    """
+
+    def __init__(self, rate=60, max_steps=15):
+        """
+
+
+        Timestep object constructor
+
+        Parameters
+        ----------
+        rate : int, optional
+        Frames per second
+
+        max_steps : int, optional
+        Most frames played for one call of advance
+
+        """
+        self.dt = 1.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0
+
+    def advance(self, elapsed):
+        """
+
+
+        Adding the time passed
+
+        Parameters
+        ----------
+        elapsed : float
+        Seconds since the last call
+
+        Return
+        ----------
+            Number of frames to play
+
+        """
+        self.accumulator += elapsed
+        # The tolerance keeps rounding error from turning a whole frame into a 0 then 2 frame stutter
+        steps = int(self.accumulator / self.dt + 1e-6)
+        self.accumulator = max(self.accumulator - steps * self.dt, 0.0)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+        return steps
+
+    def alpha(self):
+        """
+
+
+        Time left over as a share of a frame, between 0 and 1
+
+        """
+        return min(self.accumulator / self.dt, 1.0)
+
+    def reset(self):
+        """
+
+
+        Forgetting time that passed, for when the round was paused
+
+        """
+        self.accumulator = 0.0
+
+
+def random_input(seed=None):
+    """
+
+
+    Input source pressing random moves
+
+    Parameters
+    ----------
+    seed : int, optional
+    Seed for repeatable input
+
+    Return
+    ----------
+        Function taking the round and giving a move value
+
+    """
+    rng = random.Random(seed)
+    return lambda game: rng.randrange(0, 3)
+
+
+def scripted_input(moves):
+    """
+
+
+    Input source playing back a list of moves, starting over after the last one
+
+    Parameters
+    ----------
+    moves : list
+    Move values to play back
+
+    Return
+    ----------
+        Function taking the round and giving a move value
+
+    """
+    position = [0]
+
+    def next_move(game):
+        move = moves[position[0] % len(moves)]
+        position[0] += 1
+        return move
+
+    return next_move
+
+
+def chase_input(game):
+    """
+
+
+    Input source moving the basket under the lowest fruit, so rounds last long enough for soak tests
+
+    Parameters
+    ----------
+    game : Round
+    Round being played
+
+    Return
+    ----------
+        Move value
+
+    """
+    fruits = game.fruits
+    if not len(fruits):
+        return 0
+
+    target = int(numpy.argmax(fruits.y[:len(fruits)]))
+    offset = fruits.x[target] - game.basket.x
+    if abs(offset) < game.basket.vel:
+        return 0
+
+    towards_right = offset > 0
+    if game.mode.flipped:
+        towards_right = not towards_right
+    return RIGHT if towards_right else LEFT
+
+
+def simulate(mode, frames, input_source, seed=0, restart=True):
+    """
+
+
+    Headless simulation
+
+    Plays the mode for a number of frames with no display, camera or frame rate limit. With restart on, a new round is
+    started whenever one is lost, so any number of frames can be played.
+
+    Parameters
+    ----------
+    mode : Mode
+    Settings of the mode to play
+
+    frames : int
+    Number of frames to play
+
+    input_source : function
+    Function taking the round and giving a move value
+
+    seed : int, optional
+    Seed of fruit spawning
+
+    restart : bool, optional
+    Whether a lost round is followed by a new one
+
+    Return
+    ----------
+        (rounds, seconds) with every round played and the time it took
+
+    """
+    rng = random.Random(seed)
+    game = Round(mode, rng=rng)
+    rounds = [game]
+    start = time.perf_counter()
+
+    for _ in range(frames):
+        if game.game_over:
+            if not restart:
+                break
+            game = Round(mode, rng=rng)
+            rounds.append(game)
+        game.step(input_source(game))
+
+    return rounds, time.perf_counter() - start
+
+
+def measure_memory(mode, frames, input_source, seed=0, warmup=100):
+    """
+
+
+    Memory allocated per frame by Round.step, measured with tracemalloc
+
+    The round is played for a few frames first so the fruit store has grown, then every frame is stepped with tracing
+    on. Allocated is how much memory a frame held above what was held before it, growth is how much more memory is held
+    after all frames than before them. A lost round is followed by a new one, as in simulate, and the old one is freed.
+    Last, a store of 1024 fruits is filled to find what one fruit costs.
+
+    Parameters
+    ----------
+    mode : Mode
+    Settings of the mode to play
+
+    frames : int
+    Number of frames to measure
+
+    input_source : function
+    Function taking the round and giving a move value
+
+    seed : int, optional
+    Seed of fruit spawning
+
+    warmup : int, optional
+    Frames played before tracing starts
+
+    Return
+    ----------
+        (mean bytes per frame, most bytes in one frame, growth bytes, bytes per stored fruit)
+
+    """
+    rng = random.Random(seed)
+    game = Round(mode, rng=rng)
+    for _ in range(warmup):
+        game.step(input_source(game))
+
+    allocated = numpy.zeros(frames)
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+
+    for frame in range(frames):
+        if game.game_over:
+            game = Round(mode, rng=rng)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        game.step(input_source(game))
+        allocated[frame] = tracemalloc.get_traced_memory()[1] - before
+
+    end, _ = tracemalloc.get_traced_memory()
+    before, _ = tracemalloc.get_traced_memory()
+    fruits = FruitStore(capacity=1)
+    for i in range(1024):
+        fruits.add(i % len(fruit_types), i, 0)
+    fruit_bytes = (tracemalloc.get_traced_memory()[0] - before) / len(fruits)
+    tracemalloc.stop()
+
+    return allocated.mean(), int(allocated.max()), end - start, fruit_bytes
+
+
+def main():
+    """
+
+
+    Command line entry point for headless simulation
+
+    """
+    parser = argparse.ArgumentParser(description="Headless Fruit Catcher simulation")
+    parser.add_argument("--mode", default="normal", choices=sorted(modes))
+    parser.add_argument("--frames", type=int, default=100000, help="number of frames to play")
+    parser.add_argument("--input", default="random", choices=["random", "chase", "none"], help="input source")
+    parser.add_argument("--seed", type=int, default=0, help="seed of fruits and random input")
+    parser.add_argument("--memory", action="store_true", help="measure memory allocated per frame instead of speed")
+    args = parser.parse_args()
+
+    if args.input == "random":
+        input_source = random_input(args.seed)
+    elif args.input == "chase":
+        input_source = chase_input
+    else:
+        input_source = scripted_input([0])
+
+    if args.memory:
+        mean, most, growth, fruit_bytes = measure_memory(modes[args.mode], args.frames, input_source, args.seed)
+        print("mode %s, input %s, %d frames" % (args.mode, args.input, args.frames))
+        print("allocated per frame: mean %.0f B, most %d B" % (mean, most))
+        print("growth over all frames: %d B" % growth)
+        print("memory per fruit: %.0f B" % fruit_bytes)
+        return
+
+    rounds, seconds = simulate(modes[args.mode], args.frames, input_source, args.seed)
+    played = sum(game.frames for game in rounds)
+
+    print("mode %s, input %s" % (args.mode, args.input))
+    print("%d frames in %.3f s, %.0f frames per second" % (played, seconds, played / seconds))
+    print("%d rounds, best score %d" % (len(rounds), max(game.scores for game in rounds)))
+
+
+if __name__ == "__main__":
+    main()
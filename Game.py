@@ -9,12 +9,47 @@ https://stackoverflow.com/questions/10261774/pygame-error-video-system-not-initi
 """
 
 import pygame
-import random
 import ObjectDetection
-import cv2
+import Camera
+import Engine
+import VisionProcess
+import Profiler
+import os
+import time
+from collections import OrderedDict
 
 pygame.init()
-webcam = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+
+# PROFILING
+# Frame times of the game loop and of the vision pipeline, F3 shows them while playing.
+# trace_file is a .csv or .json file the frame times are written to when the game closes, None for none,
+# the vision pipeline's go next to it with _vision added to the name. At most max_trace frames are kept for it.
+trace_file = None
+max_trace = 36000 if trace_file else 0
+profiler = Profiler.Profiler(max_trace=max_trace)
+vision_profiler = Profiler.Profiler(max_trace=max_trace)
+# Input latency of every tick of play, from the capture of the newest camera frame the move was decided from: "decide"
+# up to the decision, "present" from the decision until the basket is on the display, "latency" the two together.
+# Written next to trace_file with _latency added to the name.
+latency = Profiler.Profiler(max_trace=max_trace)
+show_profile = False
+vision_frame_id = 0
+
+# VISION
+# "thread" reads the webcam on a background thread and runs detection in the game loop,
+# "process" runs the whole detection pipeline in a separate process
+vision_mode = "thread"
+webcam = None
+vision = None
+detector = ObjectDetection.Detector(scale=0.5, profiler=vision_profiler)
+# Steps the webcam down to a smaller stream when detection takes more than half of a 60 FPS frame, "thread" mode only
+tuner = None
+vision_budget = 0.008
+# Filtered marker position, predicted at every tick between camera frames
+tracker = ObjectDetection.Tracker()
+webcam_frame_id = None
+# "move" moves the basket left or right at the mode's speed, "direct" places it straight at the marker's position
+control = "move"
 
 # AESTHETICS
 black = (0, 0, 0)
@@ -28,313 +63,382 @@ bright_green = (0, 255, 0)
 smFont = pygame.font.SysFont("comicsansms", 25)
 medFont = pygame.font.SysFont("comicsansms", 33)
 lFont = pygame.font.SysFont("comicsansms", 50)
-
-# DISPLAY
-display_width = 500
-display_height = 800
-screen = pygame.display.set_mode((display_width, display_height))
-pygame.display.set_caption("FRUIT CATCHER")
-
-# IMAGES
-basket_img = pygame.image.load('basket.png')
-basket_img = pygame.transform.scale(basket_img, (125, 150))
-bg = pygame.image.load('background.jpg')
-clock = pygame.time.Clock()
+fonts = {"small": smFont, "medium": medFont, "large": lFont}
+profileFont = pygame.font.SysFont("couriernew", 14)
 
 
-class Basket(object):
+class TextCache(object):
     """
 
 
-    Basket Class
+    Rendered text registry
+
+    Keeps the surface of each string rendered in each font size and colour, so text that has not changed since the
+    last frame is blitted again instead of rendered again. Entries are kept in least recently used order and the oldest
+    is evicted once the limit is reached, so a climbing score does not grow memory without bound.
 
     Attributes
     ----------
-    x : float
-    x position of basket
-
-    y : float
-    y position of basket
-
-    vel : int
-    Speed of basket
-
-    hitbox : tuple
-    Tuple of integer values of hitbox around basket
+    max_texts : int
+    Maximum number of rendered surfaces kept
 
     Methods
     ----------
-    draw(screens)
-        draws/displays the basket on screen
+    render(text, color, size)
+        returns the cached surface of text
+
+    clear()
+        drops every cached surface
 
     Cites
     -----
-    https://www.tutorialspoint.com/What-is-difference-between-self-and-init-methods-in-python-Class
-        used to help understand Python coding again
+    https://docs.python.org/3/library/collections.html#collections.OrderedDict
+        used for least recently used ordering
     """
 
-    vel = 10
-
-    def __init__(self, x, y):
+    def __init__(self, max_texts=64):
         """
 
 
-        Basket object constructor
+        TextCache object constructor
 
         Parameters
         ----------
-        x : float
-        x position of basket
-
-        y : float
-        y position of basket
+        max_texts : int, optional
+        Maximum number of rendered surfaces kept
 
         """
-        self.x = x
-        self.y = y
-        self.hitbox = (x, y + 20, 125, 130)
+        self.max_texts = max_texts
+        self.texts = OrderedDict()
 
-    def draw(self, screens):
+    def render(self, text, color, size="small"):
         """
 
 
-        Drawing/displaying basket onto screen
+        Getting of a rendered text
 
         Parameters
         ----------
-        screens : screen
-        screen to draw/display basket on
+        text : str
+        Message of text
+
+        color : tuple
+        Tuple of integer values for rgb of text
+
+        size : str, optional
+        To indicate size of text, a key of fonts
+
+        Return
+        ----------
+            Surface of text, rendered only the first time it is asked for
+
+        """
+        key = (text, size, color)
+        surface = self.texts.get(key)
+        if surface is None:
+            surface = fonts[size].render(text, True, color)
+            self.texts[key] = surface
+            if len(self.texts) > self.max_texts:
+                self.texts.popitem(last=False)
+        else:
+            self.texts.move_to_end(key)
+        return surface
+
+    def clear(self):
+        """
+
+
+        Dropping of all cached surfaces
 
         """
-        screens.blit(basket_img, (int(self.x), int(self.y)))
-        self.hitbox = (self.x, self.y + 20, 125, 130)
+        self.texts.clear()
+
+
+texts = TextCache()
+
+# DISPLAY
+display_width = 500
+display_height = 800
+screen = None
+
+# IMAGES
 
 
-class Fruit(object):
+class SpriteCache(object):
     """
 
 
-    Fruit super class
+    Sprite asset registry
+
+    Loads each image file once, converts it to the display pixel format and keeps one pre-scaled copy per requested
+    size. Both the decoded originals and the scaled copies are kept in least recently used order and the oldest entries
+    are evicted once the limits are reached, so adding more fruit types or sizes does not grow memory without bound.
 
     Attributes
     ----------
-    x : float
-    x position of fruit
+    max_images : int
+    Maximum number of decoded source images kept
 
-    y : float
-    y position of fruit
-
-    vel : int
-    Speed of fruit
+    max_sprites : int
+    Maximum number of scaled sprites kept
 
     Methods
     ----------
-    draw(screens)
-        draws/displays the fruit on screen
+    get(filename, size)
+        returns the cached sprite for filename scaled to size
 
-    Cites
-    ----------
-    https://www.digitalocean.com/community/tutorials/understanding-class-inheritance-in-python-3
+    clear()
+        drops every cached image and sprite
 
+    Cites
+    -----
+    https://docs.python.org/3/library/collections.html#collections.OrderedDict
+        used for least recently used ordering
     """
 
-    vel = 10
-
-    def __init__(self, x, y):
+    def __init__(self, max_images=16, max_sprites=32):
         """
 
 
-        Fruit object constructor
+        SpriteCache object constructor
 
         Parameters
         ----------
-        x : float
-        x position of fruit
+        max_images : int, optional
+        Maximum number of decoded source images kept
 
-        y : float
-        y position of fruit
+        max_sprites : int, optional
+        Maximum number of scaled sprites kept
 
         """
-        self.x = x
-        self.y = y
+        self.max_images = max_images
+        self.max_sprites = max_sprites
+        self.images = OrderedDict()
+        self.sprites = OrderedDict()
+
+    def load(self, filename):
+        """
+
+
+        Loading of a source image
 
+        Image is decoded from disk and converted only the first time it is asked for.
 
-    def draw(self, screens):
+        Parameters
+        ----------
+        filename : str
+        Path of image file
+
+        Return
+        ----------
+            Converted surface at its original size
+
+        """
+        image = self.images.get(filename)
+        if image is None:
+            image = pygame.image.load(filename).convert_alpha()
+            self.images[filename] = image
+            if len(self.images) > self.max_images:
+                self.images.popitem(last=False)
+        else:
+            self.images.move_to_end(filename)
+        return image
+
+    def get(self, filename, size):
         """
 
 
-        Drawing/displaying fruit onto screen
+        Getting of a scaled sprite
 
         Parameters
         ----------
-        screens : screen
-        screen to draw/display fruit on
+        filename : str
+        Path of image file
+
+        size : tuple
+        Tuple of integer values for width and height of sprite
+
+        Return
+        ----------
+            Converted surface scaled to size
 
         """
-        pass
+        key = (filename, size)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.transform.scale(self.load(filename), size)
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_sprites:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
+
+    def clear(self):
+        """
 
 
-class Strawberry(Fruit):
-    """
+        Dropping of all cached images and sprites
 
+        """
+        self.images.clear()
+        self.sprites.clear()
 
-    Strawberry sub class of Fruit
 
-    Attributes
-    ----------
-    x : float
-    x position of strawberry inherited from Fruit
+sprites = SpriteCache()
+basket_img = None
+bg = None
+clock = pygame.time.Clock()
 
-    y : float
-    y position of strawberry inherited from Fruit
 
-    vel : int
-    Speed of strawberry inherited from Fruit
+class DirtyRenderer(object):
+    """
 
-    points : int
-    Points worth of strawberry
 
-    hitbox : tuple
-    Integer values for hitbox around strawberry
+    Dirty rectangle renderer
 
-    Methods
-    ----------
-    draw(screens)
-        draws/displays the strawberry on screen
+    Keeps the screen areas drawn on last frame. Each frame only those areas are restored from the background, and only
+    they and the areas drawn on this frame are pushed to the display, instead of redrawing and pushing the whole window.
 
-    Cites
+    Attributes
     ----------
-    https://www.digitalocean.com/community/tutorials/understanding-class-inheritance-in-python-3
+    previous : list
+    pygame.Rect of every area drawn on last frame
+
+    current : list
+    pygame.Rect of every area drawn on this frame
 
+    full : bool
+    Whether the next frame has to redraw and push the whole screen
+
+    Methods
+    ----------
+    begin()
+        restores the background under last frame's drawing
+    add(rect)
+        records an area drawn on this frame
+    finish()
+        gives the areas to push to the display
+    invalidate()
+        makes the next frame redraw the whole screen
     """
-    points = 1
 
-    def draw(self, screens):
+    def __init__(self):
         """
 
 
-        Drawing/displaying strawberry onto screen
+        DirtyRenderer object constructor
 
-        Parameters
-        ----------
-        screens : screen
-        screen to draw/display strawberry on
+        """
+        self.previous = []
+        self.current = []
+        self.full = True
 
+    def begin(self):
         """
-        fruit = pygame.image.load('strawberry.png')
 
-        fruit = pygame.transform.scale(fruit, (100, 100))
-        screens.blit(fruit, (self.x, self.y))
-        self.hitbox = (self.x, self.y, 100, 100)
 
+        Restoring the background under last frame's drawing, or all of it after invalidate
 
-class Apple(Fruit):
-    """
+        """
+        if self.full:
+            screen.blit(bg, (0, 0))
+        else:
+            for rect in self.previous:
+                screen.blit(bg, rect, rect)
 
+    def add(self, rect):
+        """
 
-    Apple sub class of Fruit
 
-    Attributes
-    ----------
-    x : float
-    x position of apple inherited from Fruit
+        Recording an area drawn on this frame
 
-    y : float
-    y position of apple inherited from Fruit
+        Parameters
+        ----------
+        rect : pygame.Rect
+        Area drawn on, as returned by blit
 
-    vel : int
-    Speed of apple inherited from Fruit
+        """
+        self.current.append(rect)
 
-    points : int
-    Points worth of apple
+    def finish(self):
+        """
 
-    hitbox : tuple
-    Integer values for hitbox around apple
 
-    Methods
-    ----------
-    draw(screens)
-        draws/displays the apple on screen
+        Areas to push to the display this frame
 
-    Cites
-    ----------
-    https://www.digitalocean.com/community/tutorials/understanding-class-inheritance-in-python-3
+        Return
+        ----------
+            List of pygame.Rect, the whole screen after invalidate
 
-    """
+        """
+        if self.full:
+            dirty = [screen.get_rect()]
+            self.full = False
+        else:
+            dirty = self.previous + self.current
 
-    points = 2
+        self.previous = self.current
+        self.current = []
+        return dirty
 
-    def draw(self, screens):
+    def invalidate(self):
         """
 
 
-        Drawing/displaying apple onto screen
-
-        Parameters
-        ----------
-        screens : screen
-        screen to draw/display apple on
+        Making the next frame redraw and push the whole screen, after something else drew over it
 
         """
-        fruit = pygame.image.load('apple.png')
-
-        fruit = pygame.transform.scale(fruit, (100, 100))
-        screens.blit(fruit, (self.x, self.y))
-        self.hitbox = (self.x, self.y, 100, 100)
+        self.full = True
 
 
-class Pineapple(Fruit):
+def draw_basket(x, y):
     """
 
 
-    Pineapple sub class of Fruit
+    Drawing/displaying basket onto screen
 
-    Attributes
+    Parameters
     ----------
     x : float
-    x position of pineapple inherited from Fruit
+    x position of basket
 
     y : float
-    y position of pineapple inherited from Fruit
+    y position of basket
 
-    vel : int
-    Speed of pineapple inherited from Fruit
+    Return
+    ----------
+        pygame.Rect of the screen area drawn on
 
-    points : int
-    Points worth of pineapple
+    """
+    return screen.blit(basket_img, (int(x), int(y)))
 
-    hitbox : tuple
-    Integer values for hitbox around pineapple
 
-    Methods
-    ----------
-    draw(screens)
-        draws/displays the pineapple on screen
+def draw_fruit(fruit_type, x, y):
+    """
 
-    Cites
-    ----------
-    https://www.digitalocean.com/community/tutorials/understanding-class-inheritance-in-python-3
 
-    """
-    points = 3
+    Drawing/displaying fruit onto screen
 
-    def draw(self, screens):
-        """
+    The sprite is taken from the shared sprite cache, so the image file is only loaded and scaled once.
 
+    Parameters
+    ----------
+    fruit_type : Engine.FruitType
+    Type of fruit to draw/display
 
-        Drawing/displaying pineapple onto screen
+    x : float
+    x position of fruit
 
-        Parameters
-        ----------
-        screens : screen
-        screen to draw/display pineapple on
+    y : float
+    y position of fruit
 
-        """
-        fruit = pygame.image.load('pineapple.png')
+    Return
+    ----------
+        pygame.Rect of the screen area drawn on
 
-        fruit = pygame.transform.scale(fruit, (100, 100))
-        screens.blit(fruit, (self.x, self.y))
-        self.hitbox = (self.x, self.y, 100, 100)
+    """
+    return screen.blit(sprites.get(fruit_type.image, fruit_type.size), (x, y))
 
 
 def text_objects(text, color, size):
@@ -343,7 +447,8 @@ def text_objects(text, color, size):
 
     Font sizes for messages and texts
 
-    Allows for messages and texts to be of a certain size
+    Allows for messages and texts to be of a certain size. Surfaces come from the text cache, so a string already
+    rendered in the same size and colour is not rendered again.
 
     Parameters
     ----------
@@ -360,16 +465,11 @@ def text_objects(text, color, size):
     -----
     https://www.youtube.com/playlist?list=PL6gx4Cwl9DGAjkwJocj7vlc_mFU-4wXJq
     """
-    if size == "small":
-        text_surface = smFont.render(text, True, color)
-    elif size == "medium":
-        text_surface = medFont.render(text, True, color)
-    elif size == "large":
-        text_surface = lFont.render(text, True, color)
+    text_surface = texts.render(text, color, size)
     return text_surface, text_surface.get_rect()
 
 
-def text_to_button(msg, color, x, y, width, height, size="small"):
+def text_to_button(msg, color, x, y, width, height, size="small", surface=None):
     """
 
 
@@ -400,16 +500,19 @@ def text_to_button(msg, color, x, y, width, height, size="small"):
         size : str, optional
         To indicate size of text
 
+        surface : pygame.Surface, optional
+        Surface to draw on, the screen by default
+
     Cites
     -----
     https://www.youtube.com/playlist?list=PL6gx4Cwl9DGAjkwJocj7vlc_mFU-4wXJq
     """
     text_surf, text_rect = text_objects(msg, color, size)
     text_rect.center = (int(x + (width / 2)), int(y + (height / 2)))
-    screen.blit(text_surf, text_rect)
+    (surface or screen).blit(text_surf, text_rect)
 
 
-def message_to_screen(msg, y_displace=0, size="small", color=black,):
+def message_to_screen(msg, y_displace=0, size="small", color=black, surface=None):
     """
 
 
@@ -432,11 +535,14 @@ def message_to_screen(msg, y_displace=0, size="small", color=black,):
         color: tuple, optional
         Tuple of integer values for rgb of text
 
+        surface : pygame.Surface, optional
+        Surface to draw on, the screen by default
+
     """
 
     text_surf, text_rect = text_objects(msg, color, size)
     text_rect.center = int(display_width / 2), int((display_height / 2) + y_displace)
-    screen.blit(text_surf, text_rect)
+    (surface or screen).blit(text_surf, text_rect)
 
 
 def score(scores):
@@ -452,10 +558,14 @@ def score(scores):
         scores : int
         Score of player
 
+    Return
+    ----------
+        pygame.Rect of the screen area drawn on
+
     """
 
-    text = smFont.render("Score: " + str(scores), True, black)
-    screen.blit(text, [0, 0])
+    text = texts.render("Score: " + str(scores), black)
+    return screen.blit(text, [0, 0])
 
 
 def life(lives):
@@ -471,429 +581,1005 @@ def life(lives):
         lives : int
         Lives of player
 
-    """
-    text = smFont.render("Lives: " + str(lives), True, black)
-    screen.blit(text, [380, 0])
-
+    Return
+    ----------
+        pygame.Rect of the screen area drawn on
 
-def pause():
     """
+    text = texts.render("Lives: " + str(lives), black)
+    return screen.blit(text, [380, 0])
 
 
-    In game pause screen
-
-    Displays options (continue or quit). Continue closes the pause screen and continues the game where it
-    left off. Quit option closes pause menu and calls game_intro() function.
-
-    Cites
-    -----
-    https://www.youtube.com/playlist?list=PL6gx4Cwl9DGAjkwJocj7vlc_mFU-4wXJq
+def over(rect, position):
     """
-    paused = True
-
-    message_to_screen("Paused", -100, "large")
-    message_to_screen("Press C to Continue or Q to Quit", 50, "medium")
-    pygame.display.update()
 
-    while paused:
 
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    paused = False
-                    game_intro()
-                elif event.key == pygame.K_c:
-                    paused = False
-            if event.type == pygame.QUIT:
-                exit()
-                paused = False
-                break
+    Whether a position is inside a button
 
-        clock.tick(5)
+    Parameters
+    ----------
+        rect : pygame.Rect
+        Area of button
 
+        position : tuple
+        (x, y) position of mouse
 
-def button(msg, x, y, width, height, inactive, active, action=None):
     """
+    return rect.right > position[0] > rect.x and rect.bottom > position[1] > rect.y
+
 
+def compose_button(msg, width, height, color):
+    """
 
-    Button maker
 
-    Funtion for making the buttons that are used throughout the game. Includes visual properties as well as indicators
-    for what the button does which then calls specific functions.
+    Drawing of one state of a button
 
     Parameters
     ----------
         msg : str
         The text to be placed in the button
 
-        x : int
-        x position of button on screen
-
-        y : int
-        y position of button on screen
-
         width : int
         width of button
 
         height : int
         height of button
 
-        inactive : tuple
-        Tuple of integer values for rgb of button when mouse is not hovering over it
-
-        active : tuple
-        Tuple of integer values for rgb of button when mouse is hovering over it
+        color : tuple
+        Tuple of integer values for rgb of button
 
-        action: str, optional
-        String to indicate what the button would do
+    Return
+    ----------
+        Surface of the button with its text
 
     Cites
     -----
     https://www.youtube.com/playlist?list=PL6gx4Cwl9DGAjkwJocj7vlc_mFU-4wXJq
     """
+    surface = pygame.Surface((width, height)).convert()
+    surface.fill(color)
+    text_to_button(msg, black, 0, 0, width, height, surface=surface)
+    return surface
 
-    mouse = pygame.mouse.get_pos()
-    click = pygame.mouse.get_pressed()
-
-    if x + width > mouse[0] > x and y + height > mouse[1] > y:
-        pygame.draw.rect(screen, active, (x, y, width, height))
-        if click[0] == 1 and action != None:
-            if action == "Info":
-                information()
-            if action == "Play":
-                modes()
-            if action == "Back":
-                game_intro()
-            if action == "Quit":
-                exit()
-            if action == "Normal":
-                normal()
-            if action == "Hard":
-                hard()
-    else:
-        pygame.draw.rect(screen, inactive, (x, y, width, height))
-    text_to_button(msg, black, x, y, width, height)
 
+class Menu(object):
+    """
+
+
+    Pre-composed menu screen
+
+    The background and every text line of a menu are drawn once onto one surface, and both the inactive and the active
+    state of each button are drawn once onto their own surfaces. Showing the menu is then one blit of the composed
+    screen, and a hover change is one blit of the other button state.
+
+    Attributes
+    ----------
+    surface : pygame.Surface
+    Background with the menu text drawn on it
+
+    buttons : list
+    (rect, inactive, active, action) of each button, with the surface of each state
 
-def game_intro():
     """
 
+    def __init__(self, messages, buttons):
+        """
+
 
-    Home Screen Page
+        Menu object constructor
 
-    Page with options for what the player can do. Has buttons for quitting,
-    play (calls the modes() function) and information (calls the information() function)
+        Parameters
+        ----------
+        messages : list
+        Arguments of message_to_screen for each text line
+
+        buttons : list
+        (msg, x, y, width, height, inactive, active, action) of each button, inactive and active being the rgb
+        colours of the button when the mouse is not and is hovering over it
+
+        """
+        self.surface = bg.copy()
+        for message in messages:
+            message_to_screen(*message, surface=self.surface)
+
+        self.buttons = []
+        for msg, x, y, width, height, inactive, active, action in buttons:
+            self.buttons.append((pygame.Rect(x, y, width, height), compose_button(msg, width, height, inactive),
+                                 compose_button(msg, width, height, active), action))
+
+
+# Menus composed so far, by scene class
+menus = {}
+
+
+def set_vision_idle(idle):
     """
-    intro = True
-    while intro:
-        screen.blit(bg, (0, 0))
-        message_to_screen("FRUIT CATCHER", -100, "large", dark_green)
 
-        button("PLAY", 50, 500, 100, 50, dark_green, bright_green, action="Play")
-        button("INFO", 200, 500, 100, 50, dark_yellow, bright_yellow, action="Info")
-        button("QUIT", 350, 500, 100, 50, dark_red, bright_red, action="Quit")
-        pygame.display.update()
-        clock.tick(15)
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                exit()
-                intro = False
-                break
+    Suspending or resuming webcam reading and detection
+
+    Parameters
+    ----------
+    idle : bool
+    Whether the webcam is left alone, while the scene showing does not use it
+
+    """
+    for video in (vision, webcam):
+        if video is not None:
+            if idle:
+                video.pause()
+            else:
+                video.resume()
 
 
-def information():
+def track(skip=False):
     """
 
 
-    Information Page
+    Feeding the tracker from the webcam
 
-    Page with instructions on how the game works. Button for back calls the game_intro() function
-    """
-    info = True
-    while info:
-        screen.blit(bg, (0, 0))
-        message_to_screen("INFORMATION", -300, "large", dark_green,)
-        message_to_screen("Objective", -200, "medium")
-        message_to_screen("Catch as many Fruits as you can", -150)
-        message_to_screen("by moving the Basket", -100)
-        message_to_screen("But Watch Out! You only get 3 LIVES!", -50)
-        message_to_screen("Controls", 0, "medium")
-        message_to_screen("Move Left: Move Marker Left", 50)
-        message_to_screen("Move Right: Move Marker Right", 100)
-        message_to_screen("Pause: Press P", 150)
-
-        button("BACK", 200, 600, 100, 50, dark_yellow, bright_yellow, action="Back")
-        pygame.display.update()
-        clock.tick(15)
+    Uses the vision process when vision_mode is "process", otherwise runs detection on the newest webcam frame. Each
+    new position goes into the tracker, stamped with the time its frame was captured. A frame already seen is not
+    searched again. The tracker follows the marker's centroid and width, from which it still finds the left edge the
+    move thresholds are meant for. The stage times of each new frame from the vision process are added to
+    vision_profiler, and detection times in the game loop are reported to the tuner.
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                exit()
-                info = False
-                break
+    Parameters
+    ----------
+    skip : bool, optional
+    Whether detection is left out this tick, because the game loop is behind. It is still run when the tracker has
+    lost the marker.
 
+    Return
+    ----------
+        time.perf_counter() value the tracker's prediction is wanted for
 
-def modes():
+    """
+    global vision_frame_id, webcam_frame_id
+
+    now = time.perf_counter()
+    if vision is not None:
+        frame_id, stage_times = vision.get_stage_times()
+        if frame_id != vision_frame_id:
+            vision_frame_id = frame_id
+            for stage, seconds in stage_times.items():
+                vision_profiler.add(stage, seconds)
+            vision_profiler.end_frame()
+            marker, age = vision.get_marker()
+            if marker is not None:
+                tracker.update(marker[0], now - age, marker[1])
+        return now
+
+    if skip and tracker.predict(now) is not None:
+        return now
+
+    # FrameReplay has no frame_id, every read of it is a new frame
+    frame_id = getattr(webcam, "frame_id", None)
+    if frame_id is None or frame_id != webcam_frame_id:
+        webcam_frame_id = frame_id
+        detector.get_bounding_rect(webcam)
+        marker = detector.get_marker()
+        if marker is not None:
+            tracker.update(marker[0], detector.timestamp, marker[1])
+        if tuner is not None:
+            tuner.update(sum(seconds for stage, seconds in vision_profiler.latest.items() if stage != "capture"))
+    return now
+
+
+def get_direction(skip=False):
     """
 
 
-    Game mode selector
+    Move value from the webcam
 
-    Selector screen for Normal and Hard modes. Menu with buttons and descriptions of each gamemode. Clicking button
-    calls the specified game mode's function (normal() and hard()).
-    """
-    mode = True
-    while mode:
-        screen.blit(bg, (0, 0))
-        message_to_screen("CHOOSE MODE", -300, "large", dark_green, )
-        message_to_screen("Normal mode is plain at regular speed", -150)
-        message_to_screen("with basic controls", -100)
-        message_to_screen("All controls are now flipped", 50)
-        message_to_screen("Move Left: Move Marker Right", 100)
-        message_to_screen("Move Right: Move Marker Left", 150)
-        message_to_screen("Everything is also FASTER", 200)
-        message_to_screen("GOOD LUCK!", 250)
-
-        button("NORMAL", 190, 175, 120, 50, dark_green, bright_green, action="Normal")
-        button("HARD", 200, 375, 100, 50, dark_red, bright_red, action="Hard")
-        pygame.display.update()
-        clock.tick(15)
+    Decided from the tracker's prediction for now, so the basket keeps moving smoothly between camera frames.
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                exit()
-                mode = False
-                break
+    Parameters
+    ----------
+    skip : bool, optional
+    Whether detection is left out this tick, see track
+
+    """
+    return tracker.get_move(track(skip))
 
 
-def normal():
+def get_position(skip=False):
     """
 
 
-    Normal game mode
+    Marker position from the webcam
 
-    Video input determines move value. Based on move value, the basket moves in the direction of the value.
-    Random fruits (apples, strawberries, pineapples) are generated and put into the fruit list. When fruit hits
-    basket, it is removed from the list and score is added to total score. When fruit hits the floor, it is taken out
-    of the list and lives is decreased. When game is lost, there is an option to restart the game or go back to main
-    menu.
+    Parameters
+    ----------
+    skip : bool, optional
+    Whether detection is left out this tick, see track
 
-    Cites
-    -----
-    https://codereview.stackexchange.com/questions/73847/simple-random-falling-object-animation-in-java
-        used as example when making falling code in Python
-    https://stackoverflow.com/questions/20102075/move-car-horizontal-python-classes
-        used for basket movement
-    https://www.youtube.com/playlist?list=PLlEgNdBJEO-lwI_F15DAQmgmqh5E7OYt_
-        used for collisions and walls
-    https://www.youtube.com/watch?v=K9qMm3JbOH0
-        used for hitboxes and movement
-    """
-
-    scores = 0
-    lives = 3
-    fruits = []
-    fruit_counter = 0
-    add_fruit_rate = 75
-    basket = Basket(display_width * 0.35, display_height - 160)
-    play = True
-    restart = False
-
-    while play:
-
-        if restart:
-            message_to_screen("GAME OVER", -50, "large")
-            message_to_screen("YOU ARE BAD", 0, "large")
-            message_to_screen("Press R to Restart or Q to Quit", 50, "medium")
-            pygame.display.update()
-
-        while restart:
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_q:
-                        play = False
-                        restart = False
-                        game_intro()
-                    if event.key == pygame.K_r:
-                        normal()
-                if event.type == pygame.QUIT:
-                    exit()
-                    play = False
-                    break
-
-        direction = ObjectDetection.get_move(webcam)
-        keys = pygame.key.get_pressed()
-
-        if direction == 1 and basket.x > basket.vel - 5:
-            basket.x -= .3 * basket.vel
-        elif direction == 2 and basket.x < 500 - 150 - basket.vel:
-            basket.x += .3 * basket.vel
-
-        elif keys[pygame.K_p]:
-            pause()
-
-        screen.blit(bg, (0, 0))
-        fruit_counter += 1
-
-        if fruit_counter == add_fruit_rate:
-            fruit_counter = 0
-            f_startx = random.randrange(100, display_width - 100)
-            f_starty = 0
-            f_type = random.randrange(0, 3)
-
-            if f_type == 0:
-                new_fruit = Strawberry(f_startx, f_starty)
-            elif f_type == 1:
-                new_fruit = Apple(f_startx, f_starty)
-            else:
-                new_fruit = Pineapple(f_startx, f_starty)
+    Return
+    ----------
+        Tracker's predicted (position, velocity) for now, normalized to the camera image width, None when the marker is
+        lost
 
-            fruits.append(new_fruit)
+    """
+    return tracker.get_position(track(skip))
 
-        for item in fruits:
-            item.draw(screen)
-            item.y += .5 * item.vel
 
-        for item in fruits[:]:
-            if (item.hitbox[0] >= basket.hitbox[0] - 90) and (item.hitbox[0] <= basket.hitbox[0] + 90):
-                if basket.hitbox[1] - 50 <= item.hitbox[1] <= basket.hitbox[1] - 20:
-                    fruits.remove(item)
-                    scores += item.points
+class ProfileOverlay(object):
+    """
 
-            if (item.y >= display_height - 50) and (item.y <= display_height + 100):
-                if display_height - 150 <= item.y <= display_height - 40:
-                    if lives >= 2:
-                        fruits.remove(item)
-                        lives -= 1
 
-                    else:
-                        restart = True
+    Frame time overlay
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                exit()
-                play = False
+    Table of the mean, median, 95th and 99th percentile milliseconds of every stage of the game loop and of the vision
+    pipeline over the recent frames. The table is rendered again only every few frames, in between the same surface
+    is blitted, so the overlay costs little of the time it shows.
 
-        score(scores)
-        life(lives)
-        basket.draw(screen)
-        pygame.display.update()
-        clock.tick(60)
+    Attributes
+    ----------
+    refresh : int
+    Frames between renders of the table
 
+    surface : pygame.Surface
+    Last rendered table, None before the first
 
-def hard():
+    age : int
+    Frames since the table was rendered
     """
 
+    def __init__(self, refresh=15):
+        """
 
-    Hard game mode
 
-    Video input determines move value. Based on move value, the basket moves in the opposite direction to the value.
-    Random fruits (apples, strawberries, pineapples) are generated and put into the fruit list. When fruit hits basket,
-    it is removed from the list and score is added to total score. When fruit hits the floor, it is taken out of the
-    list and lives is decreased. When game is lost, there is an option to restart game or go back to main menu.
+        ProfileOverlay object constructor
 
-    Cites
-    -----
-    https://codereview.stackexchange.com/questions/73847/simple-random-falling-object-animation-in-java
-        used as example when making falling code in Python
-    https://stackoverflow.com/questions/20102075/move-car-horizontal-python-classes
-        used for basket movement
-    https://www.youtube.com/playlist?list=PLlEgNdBJEO-lwI_F15DAQmgmqh5E7OYt_
-        used for collisions and walls
-    https://www.youtube.com/watch?v=K9qMm3JbOH0
-        used for hitboxes and movement
-    """
-
-    scores = 0
-    lives = 3
-    fruits = []
-    fruit_counter = 0
-    add_fruit_rate = 45
-    basket = Basket(display_width * 0.35, display_height - 160)
-    play = True
-    restart = False
-
-    while play:
-
-        if restart:
-            message_to_screen("GAME OVER", -50, "large")
-            message_to_screen("YOU ARE BAD", 0, "large")
-            message_to_screen("Press R to Restart or Q to Quit", 50, "medium")
-            pygame.display.update()
-
-        while restart:
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_q:
-                        play = False
-                        restart = False
-                        game_intro()
-                    if event.key == pygame.K_r:
-                        hard()
-                if event.type == pygame.QUIT:
-                    exit()
-                    play = False
-                    break
-
-        direction = ObjectDetection.get_move(webcam)
-        keys = pygame.key.get_pressed()
-
-        if direction == 2 and basket.x > basket.vel - 5:
-            basket.x -= basket.vel
-        elif direction == 1 and basket.x < 500 - 150 - basket.vel:
-            basket.x += basket.vel
-        elif keys[pygame.K_p]:
-            pause()
-
-        screen.blit(bg, (0, 0))
-        fruit_counter += 1
-
-        if fruit_counter == add_fruit_rate:
-            fruit_counter = 0
-            f_startx = random.randrange(100, display_width - 100)
-            f_starty = 0
-            f_type = random.randrange(0, 3)
-
-            if f_type == 0:
-                new_fruit = Strawberry(f_startx, f_starty)
-            elif f_type == 1:
-                new_fruit = Apple(f_startx, f_starty)
-            else:
-                new_fruit = Pineapple(f_startx, f_starty)
+        Parameters
+        ----------
+        refresh : int, optional
+        Frames between renders of the table
 
-            fruits.append(new_fruit)
+        """
+        self.refresh = refresh
+        self.surface = None
+        self.age = 0
 
-        for item in fruits:
-            item.draw(screen)
-            item.y += 1.13 * item.vel
+    def compose(self):
+        """
 
-        for item in fruits[:]:
-            if (item.hitbox[0] >= basket.hitbox[0] - 90) and (item.hitbox[0] <= basket.hitbox[0] + 90):
-                if basket.hitbox[1] - 50 <= item.hitbox[1] <= basket.hitbox[1] - 20:
-                    fruits.remove(item)
-                    scores += item.points
 
-            if (item.y >= display_height - 50) and (item.y <= display_height + 100):
-                if display_height - 150 <= item.y <= display_height - 40:
-                    if lives >= 2:
-                        fruits.remove(item)
-                        lives -= 1
+        Rendering the table
 
-                    else:
-                        restart = True
+        Return
+        ----------
+            Translucent surface with the table
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                exit()
-                play = False
+        """
+        lines = ["%-10s %6s %6s %6s %6s" % ("ms", "mean", "p50", "p95", "p99")]
+        # Latency stages overlap, so they are not totalled
+        for title, stages, totalled in (("game", profiler.summary(), True), ("vision", vision_profiler.summary(), True),
+                                        ("input", latency.summary(), False)):
+            if stages:
+                lines.append(title)
+                total = sum(mean for mean, _, _, _ in stages.values())
+                for name, (mean, p50, p95, p99) in stages.items():
+                    lines.append("%-10s %6.2f %6.2f %6.2f %6.2f" % (name, mean, p50, p95, p99))
+                if totalled:
+                    lines.append("%-10s %6.2f" % ("total", total))
+
+        rendered = [profileFont.render(line, True, white) for line in lines]
+        surface = pygame.Surface((max(text.get_width() for text in rendered) + 10,
+                                  sum(text.get_height() for text in rendered) + 10))
+        surface.set_alpha(190)
+        y = 5
+        for text in rendered:
+            surface.blit(text, (5, y))
+            y += text.get_height()
+        return surface
+
+    def draw(self):
+        """
 
-        score(scores)
-        life(lives)
-        basket.draw(screen)
-        pygame.display.update()
-        clock.tick(60)
 
+        Drawing the table below the score
+
+        Return
+        ----------
+            pygame.Rect of the screen area drawn on
+
+        """
+        if self.surface is None or self.age >= self.refresh:
+            self.surface = self.compose()
+            self.age = 0
+        self.age += 1
+        return screen.blit(self.surface, (5, 40))
+
+
+overlay = ProfileOverlay()
+
+
+def export_profile(path):
+    """
+
+
+    Writing the frame times of the game loop and the vision pipeline, and the input latency, to trace files
+
+    Parameters
+    ----------
+    path : str
+    Path of .csv or .json file for the game loop, the vision pipeline's file gets _vision added to the name and the
+    latency's _latency
+
+    """
+    root, extension = os.path.splitext(path)
+    profiler.export(path)
+    vision_profiler.export(root + "_vision" + extension)
+    latency.export(root + "_latency" + extension)
+
+
+class Scene(object):
+    """
+
+
+    Scene super class
+
+    Every screen of the game is a scene. run() keeps one current scene and, each tick, hands it the events and calls
+    update, which draws the scene and returns the scene to switch to. Scenes never call each other, so however many
+    times the player goes through the menus or restarts, the stack stays the same depth and old scenes are freed.
+
+    Idle scenes only change on input. While one is showing, run() sleeps until an event arrives or timeout passes
+    instead of ticking fps times a second, and the webcam is not read.
+
+    Attributes
+    ----------
+    fps : int
+    Ticks per second while the scene is showing, the most while it is idle
+
+    idle : bool
+    Whether the scene only changes on input
+
+    timeout : int
+    Most milliseconds an idle scene sleeps without an event
+
+    dirty : list
+    pygame.Rect of the areas the last update changed, None when the whole screen is pushed to the display
+
+    Methods
+    ----------
+    handle(event)
+        reacts to a pygame event, returns the scene to switch to or None to stay
+    update()
+        draws the scene, returns the scene to switch to or None to stay
+    presented(now)
+        told when what update drew is on the display
+    """
+
+    fps = 15
+    idle = True
+    timeout = 1000
+    dirty = None
+
+    def handle(self, event):
+        """
+
+
+        Reacting to a pygame event
+
+        Parameters
+        ----------
+        event : pygame.event.Event
+        Event to react to
+
+        Return
+        ----------
+            Scene to switch to, None to stay
+
+        """
+        return None
+
+    def update(self):
+        """
+
+
+        Drawing the scene for one tick
+
+        Return
+        ----------
+            Scene to switch to, None to stay
+
+        """
+        return None
+
+    def presented(self, now):
+        """
+
+
+        Being told the last update is on the display
+
+        Parameters
+        ----------
+        now : float
+        time.perf_counter() value after the display was updated
+
+        """
+        pass
+
+
+def scene_for(action):
+    """
+
+
+    Scene a button action switches to
+
+    Parameters
+    ----------
+    action : str
+    Action of the button clicked
+
+    Return
+    ----------
+        The new scene, quit_scene for "Quit"
+
+    """
+    if action == "Info":
+        return InfoScene()
+    if action == "Play":
+        return ModesScene()
+    if action == "Back":
+        return IntroScene()
+    if action == "Normal":
+        return PlayScene(Engine.normal_mode)
+    if action == "Hard":
+        return PlayScene(Engine.hard_mode)
+    return quit_scene
+
+
+class MenuScene(Scene):
+    """
+
+
+    Menu super class
+
+    A menu is text lines and buttons over the background. Its Menu is composed the first time any scene of the class
+    is shown and reused after that. The whole composed screen is drawn on the first tick, after which only buttons
+    whose hover state changed are drawn and pushed to the display. Menus are idle, so with the mouse still nothing is
+    drawn at all.
+
+    Attributes
+    ----------
+    messages : list
+    Arguments of message_to_screen for each text line
+
+    buttons : list
+    (msg, x, y, width, height, inactive, active, action) of each button, see Menu
+
+    hovered : list
+    Whether the mouse was over each button last tick, None before the first tick
+    """
+
+    messages = []
+    buttons = []
+
+    def __init__(self):
+        """
+
+
+        MenuScene object constructor
+
+        """
+        self.hovered = None
+
+    def menu(self):
+        """
+
+
+        Menu of the scene, composed the first time it is asked for
+
+        """
+        menu = menus.get(type(self))
+        if menu is None:
+            menu = menus[type(self)] = Menu(self.messages, self.buttons)
+        return menu
+
+    def handle(self, event):
+        """
+
+
+        Reacting to clicks
+
+        A left click on a button switches to the scene of its action. Clicks are taken from the events, so a click is
+        not missed when it is let go before the next tick.
+
+        """
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            for rect, _, _, action in self.menu().buttons:
+                if over(rect, event.pos):
+                    return scene_for(action)
+        return None
+
+    def update(self):
+        """
+
+
+        Drawing the menu and the buttons whose hover state changed
+
+        """
+        menu = self.menu()
+        mouse = pygame.mouse.get_pos()
+        hovered = [over(rect, mouse) for rect, _, _, _ in menu.buttons]
+
+        if self.hovered is None:
+            screen.blit(menu.surface, (0, 0))
+            self.dirty = None
+        else:
+            self.dirty = []
+
+        for index, (rect, inactive, active, _) in enumerate(menu.buttons):
+            if self.hovered is None or hovered[index] != self.hovered[index]:
+                screen.blit(active if hovered[index] else inactive, rect)
+                if self.dirty is not None:
+                    self.dirty.append(rect)
+
+        self.hovered = hovered
+        return None
+
+
+class IntroScene(MenuScene):
+    """
+
+
+    Home Screen Page
+
+    Page with options for what the player can do. Has buttons for quitting,
+    play (switches to ModesScene) and information (switches to InfoScene)
+    """
+
+    messages = [("FRUIT CATCHER", -100, "large", dark_green)]
+    buttons = [("PLAY", 50, 500, 100, 50, dark_green, bright_green, "Play"),
+               ("INFO", 200, 500, 100, 50, dark_yellow, bright_yellow, "Info"),
+               ("QUIT", 350, 500, 100, 50, dark_red, bright_red, "Quit")]
+
+
+class InfoScene(MenuScene):
+    """
+
+
+    Information Page
+
+    Page with instructions on how the game works. Button for back switches to IntroScene
+    """
+
+    messages = [("INFORMATION", -300, "large", dark_green),
+                ("Objective", -200, "medium"),
+                ("Catch as many Fruits as you can", -150),
+                ("by moving the Basket", -100),
+                ("But Watch Out! You only get 3 LIVES!", -50),
+                ("Controls", 0, "medium"),
+                ("Move Left: Move Marker Left", 50),
+                ("Move Right: Move Marker Right", 100),
+                ("Pause: Press P", 150)]
+    buttons = [("BACK", 200, 600, 100, 50, dark_yellow, bright_yellow, "Back")]
+
+
+class ModesScene(MenuScene):
+    """
+
+
+    Game mode selector
+
+    Selector screen for Normal and Hard modes. Menu with buttons and descriptions of each gamemode. Clicking button
+    switches to a PlayScene of the specified game mode.
+    """
+
+    messages = [("CHOOSE MODE", -300, "large", dark_green),
+                ("Normal mode is plain at regular speed", -150),
+                ("with basic controls", -100),
+                ("All controls are now flipped", 50),
+                ("Move Left: Move Marker Right", 100),
+                ("Move Right: Move Marker Left", 150),
+                ("Everything is also FASTER", 200),
+                ("GOOD LUCK!", 250)]
+    buttons = [("NORMAL", 190, 175, 120, 50, dark_green, bright_green, "Normal"),
+               ("HARD", 200, 375, 100, 50, dark_red, bright_red, "Hard")]
+
+
+class PlayScene(Scene):
+    """
+
+
+    Game play
+
+    Video input determines move value, or the basket's position when control is "direct". The Engine round moves the
+    basket, generates random fruits, catches them, keeps score and takes lives, and this scene draws the round every
+    tick. Pressing P switches to PausedScene, and losing the round switches to GameOverScene.
+
+    The round is played at a fixed number of frames per second of real time, however fast this scene is ticked. A
+    slow tick, for example when the camera stalls, plays several frames at once, and a fast one may play none. Fruits
+    and basket are drawn between their last two positions, by how far into the next frame the clock is.
+
+    Attributes
+    ----------
+    mode : Engine.Mode
+    Settings of the mode being played
+
+    game : Engine.Round
+    Round being played
+
+    renderer : DirtyRenderer
+    Renderer restoring and pushing only the areas the fruits, basket and text were drawn on
+
+    timestep : Engine.Timestep
+    Accumulator turning real time into frames of the round
+
+    last_tick : float
+    time.perf_counter() value of the last tick, None before the first one
+
+    basket_from : float
+    x position of basket before the last frame played
+
+    captured : float
+    time.perf_counter() value when the newest camera frame behind the last move was captured, None when the marker was
+    lost
+
+    decided : float
+    time.perf_counter() value when the last move was decided
+    """
+
+    fps = 60
+    idle = False
+
+    def __init__(self, mode):
+        """
+
+
+        PlayScene object constructor
+
+        Parameters
+        ----------
+        mode : Engine.Mode
+        Settings of the mode to play
+
+        """
+        self.mode = mode
+        self.game = Engine.Round(mode, display_width, display_height)
+        self.renderer = DirtyRenderer()
+        self.timestep = Engine.Timestep(rate=60)
+        self.last_tick = None
+        self.basket_from = self.game.basket.x
+        self.captured = None
+        self.decided = None
+
+    def handle(self, event):
+        """
+
+
+        Reacting to key presses
+
+        F3 shows or hides the frame time overlay, P pauses the round
+
+        """
+        global show_profile
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            show_profile = not show_profile
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+            return PausedScene(self)
+        return None
+
+    def resume(self):
+        """
+
+
+        Coming back from the pause screen, the paused time is not played and the whole screen is redrawn
+
+        """
+        self.last_tick = None
+        self.timestep.reset()
+        self.renderer.invalidate()
+
+    def update(self):
+        """
+
+
+        Moving the basket, advancing the round by the frames due since the last tick and drawing it
+
+        """
+        now = time.perf_counter()
+        elapsed = self.timestep.dt if self.last_tick is None else now - self.last_tick
+        self.last_tick = now
+
+        # More than two frames late, the tracker's prediction stands in for this tick's detection
+        skip = elapsed > 2 * self.timestep.dt
+        direction = position = None
+        if control == "direct":
+            marker = get_position(skip)
+            position = None if marker is None else marker[0]
+        else:
+            direction = get_direction(skip)
+        self.decided = time.perf_counter()
+        self.captured = tracker.time if tracker.predict(self.decided) is not None else None
+        profiler.lap("input")
+        for _ in range(self.timestep.advance(elapsed)):
+            self.basket_from = self.game.basket.x
+            self.game.step(direction, position)
+        profiler.lap("simulate")
+
+        alpha = self.timestep.alpha()
+        renderer = self.renderer
+        renderer.begin()
+        profiler.lap("background")
+
+        for fruit_type, x, y in self.game.fruits.items(alpha):
+            renderer.add(draw_fruit(fruit_type, x, y))
+        profiler.lap("fruits")
+
+        renderer.add(score(self.game.scores))
+        renderer.add(life(self.game.lives))
+        basket = self.game.basket
+        renderer.add(draw_basket(self.basket_from + (basket.x - self.basket_from) * alpha, basket.y))
+        profiler.lap("sprites")
+
+        if show_profile:
+            renderer.add(overlay.draw())
+            profiler.lap("overlay")
+        self.dirty = renderer.finish()
+
+        if self.game.game_over:
+            return GameOverScene(self)
+        return None
+
+    def presented(self, now):
+        """
+
+
+        Recording the input latency of the tick
+
+        """
+        if self.captured is not None:
+            latency.add("decide", self.decided - self.captured)
+            latency.add("present", now - self.decided)
+            latency.add("latency", now - self.captured)
+            latency.end_frame()
+
+
+class PausedScene(Scene):
+    """
+
+
+    In game pause screen
+
+    Displays options (continue or quit) over the paused round. Continue switches back to the round where it left off.
+    Quit switches to IntroScene.
+
+    Attributes
+    ----------
+    play_scene : PlayScene
+    Round that was paused
+
+    Cites
+    -----
+    https://www.youtube.com/playlist?list=PL6gx4Cwl9DGAjkwJocj7vlc_mFU-4wXJq
+    """
+
+    fps = 5
+
+    def __init__(self, play_scene):
+        """
+
+
+        PausedScene object constructor
+
+        Parameters
+        ----------
+        play_scene : PlayScene
+        Round that was paused
+
+        """
+        self.play_scene = play_scene
+        self.drawn = False
+
+    def handle(self, event):
+        """
+
+
+        Reacting to key presses
+
+        C switches back to the round, Q to the home screen
+
+        """
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_q:
+                return IntroScene()
+            elif event.key == pygame.K_c:
+                self.play_scene.resume()
+                return self.play_scene
+        return None
+
+    def update(self):
+        """
+
+
+        Drawing the pause options over the round once, nothing is pushed to the display after that
+
+        """
+        if not self.drawn:
+            message_to_screen("Paused", -100, "large")
+            message_to_screen("Press C to Continue or Q to Quit", 50, "medium")
+            self.drawn = True
+            self.dirty = None
+        else:
+            self.dirty = []
+        return None
+
+
+class GameOverScene(Scene):
+    """
+
+
+    Game over screen
+
+    Displays options (restart or quit) over the lost round. Restart switches to a new round of the same mode, quit
+    switches to IntroScene.
+
+    Attributes
+    ----------
+    mode : Engine.Mode
+    Settings of the mode that was lost
+    """
+
+    def __init__(self, play_scene):
+        """
+
+
+        GameOverScene object constructor
+
+        Parameters
+        ----------
+        play_scene : PlayScene
+        Round that was lost
+
+        """
+        self.mode = play_scene.mode
+        self.drawn = False
+
+    def handle(self, event):
+        """
+
+
+        Reacting to key presses
+
+        R starts a new round of the same mode, Q switches to the home screen
+
+        """
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_q:
+                return IntroScene()
+            if event.key == pygame.K_r:
+                return PlayScene(self.mode)
+        return None
+
+    def update(self):
+        """
+
+
+        Drawing the game over options over the round once, nothing is pushed to the display after that
+
+        """
+        if not self.drawn:
+            message_to_screen("GAME OVER", -50, "large")
+            message_to_screen("YOU ARE BAD", 0, "large")
+            message_to_screen("Press R to Restart or Q to Quit", 50, "medium")
+            self.drawn = True
+            self.dirty = None
+        else:
+            self.dirty = []
+        return None
+
+
+# Returned by a scene to end the game
+quit_scene = Scene()
+
+
+def present(scene):
+    """
+
+
+    Pushing what a scene drew to the display
+
+    Only the areas in the scene's dirty list are pushed when it has one. The scene is told once they are on the
+    display.
+
+    Parameters
+    ----------
+    scene : Scene
+    Scene that was just updated
+
+    """
+    if scene.dirty is None:
+        pygame.display.update()
+    else:
+        pygame.display.update(scene.dirty)
+    scene.presented(time.perf_counter())
+
+
+def run(scene):
+    """
+
+
+    Top level game loop
+
+    Runs the current scene until it switches to another, for as long as the game is open. This is the only loop, so
+    memory and stack depth stay the same however long the session runs. Each tick is a profiler frame: getting or
+    sleeping on events is timed as "events", the scene's update as "scene", less any stages it times itself, then the
+    display update and the wait for the clock.
+
+    Parameters
+    ----------
+    scene : Scene
+    First scene to show
+
+    Cites
+    -----
+    https://stackoverflow.com/questions/10261774/pygame-error-video-system-not-initialized
+        used to help solve exiting issue
+    """
+    updated = None
+
+    while scene is not quit_scene:
+        profiler.begin()
+        events = pygame.event.get()
+        if not events and scene.idle and scene is updated:
+            # Nothing can change until there is input, sleep until then
+            events = [pygame.event.wait(scene.timeout)]
+        profiler.lap("events")
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                return
+            scene = scene.handle(event) or scene
+
+        if scene is quit_scene:
+            return
+
+        if updated is None or scene.idle != updated.idle:
+            set_vision_idle(scene.idle)
+        updated = scene
+        next_scene = scene.update()
+        profiler.lap("scene")
+        present(scene)
+        profiler.lap("display")
+
+        scene = next_scene or scene
+        clock.tick(scene.fps)
+        profiler.lap("wait")
+        profiler.end_frame()
+
+
+def open_window():
+    """
+
+
+    Opening the game window and loading the images drawn on it
+
+    """
+    global screen, basket_img, bg
+
+    screen = pygame.display.set_mode((display_width, display_height))
+    pygame.display.set_caption("FRUIT CATCHER")
+    basket_img = sprites.get('basket.png', (125, 150))
+    bg = pygame.image.load('background.jpg').convert()
+
+
+if __name__ == "__main__":
+    open_window()
+
+    if vision_mode == "process":
+        vision = VisionProcess.VisionProcess(0).start()
+    else:
+        video_input = Camera.open_camera(0)
+        print("webcam granted %dx%d at %g FPS %s" % Camera.granted(video_input))
+        webcam = Camera.FrameGrabber(video_input).start()
+        tuner = Camera.CaptureTuner(webcam, vision_budget)
+
+    run(IntroScene())
+    pygame.quit()
 
-game_intro()
-normal()
\ No newline at end of file
+    if trace_file:
+        export_profile(trace_file)
@@ -4,11 +4,42 @@ This file is responsible for all the computing behind the vision aspects of the
 tracking work from webcam input is done here. The Game file calls the get_move method from this file.
 """
 
+import time
+
 import cv2
 import numpy
+from collections import OrderedDict, namedtuple
+
+# HSV colour thresholds of the green marker
+top_threshold = numpy.array([40, 100, 100])
+bottom_threshold = numpy.array([70, 225, 255])
+
+# Erosion kernel of get_contours
+kernel = numpy.ones((5, 5), numpy.uint8)
+
+# Smallest contour area in full resolution pixels counted as the marker
+min_area = 100
+
+# Frame width the x thresholds of move_from_x are given for, x positions in frames of other widths are scaled to it
+frame_width = 640
+
+# X thresholds of move_from_x: past move_left the move is left, under move_right it is right
+move_left = 450
+move_right = 250
 
+# Target found by a blob backend: centroid is (x, y), rect is (x, y, width, height)
+Blob = namedtuple("Blob", ["centroid", "rect", "area"])
 
-def filter_green(frame):
+# Stages a Detector times when it has a profiler: reading the frame, downscaling, HSV conversion, thresholding and
+# cleaning the mask, and finding and picking the marker blob
+stages = ["capture", "resize", "hsv", "mask", "blob"]
+
+# Lookup tables built by get_lut, most recently used last
+lut_cache = OrderedDict()
+max_luts = 4
+
+
+def filter_green(frame, hsv=None, mask=None):
     """
 
     Filters out green from video input.
@@ -20,6 +51,12 @@ def filter_green(frame):
         frame : frame
         The frame from the video input that needs filtering
 
+        hsv : array, optional
+        Buffer of the frame's shape to write the HSV frame into instead of allocating one
+
+        mask : array, optional
+        Buffer of the frame's height and width to write the result into instead of allocating one
+
     Return
     ----------
         cv2.inRange(hsv, top_threshold, bottom_threshold)
@@ -31,28 +68,183 @@ def filter_green(frame):
 
     """
 
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=hsv)
+
+    return cv2.inRange(hsv, top_threshold, bottom_threshold, dst=mask)
+
+
+def build_lut(top, bottom, bits=6):
+    """
+
+    Builds a lookup table from BGR colour to mask value.
+
+    Each channel is quantized to the given number of bits. The centre colour of every quantized cell is converted to HSV
+    and thresholded once, so segmenting a frame afterwards only needs a table lookup per pixel. With 8 bits the table
+    is exact, with fewer bits it is smaller and faster to build but can differ from filter_green right at the edges of
+    the thresholds.
+
+    Parameters
+    ----------
+        top : array
+        Lower HSV threshold
 
-    top_threshold = numpy.array([40, 100, 100])
-    bottom_threshold = numpy.array([70, 225, 255])
+        bottom : array
+        Upper HSV threshold
 
-    return cv2.inRange(hsv, top_threshold, bottom_threshold)
+        bits : int, optional
+        Bits kept from each BGR channel
 
+    Return
+    ----------
+        (channel_lut, table)
+            channel_lut maps each channel value to its part of the table index, table maps the index to 0 or 255
 
-def get_contours(frame):
+    """
+    shift = 8 - bits
+    levels = numpy.arange(1 << bits)
+    b, g, r = numpy.meshgrid(levels, levels, levels, indexing="ij")
+    centres = (numpy.stack([b, g, r], -1) << shift) + ((1 << shift) >> 1)
+    centres = centres.astype(numpy.uint8).reshape(-1, 1, 3)
+
+    table = cv2.inRange(cv2.cvtColor(centres, cv2.COLOR_BGR2HSV), top, bottom).ravel()
+
+    channel = numpy.arange(256) >> shift
+    channel_lut = numpy.stack([channel << (2 * bits), channel << bits, channel], -1)
+    channel_lut = channel_lut.astype(numpy.int32).reshape(1, 256, 3)
+
+    return channel_lut, table
+
+
+def get_lut(top=top_threshold, bottom=bottom_threshold, bits=6):
+    """
+
+    Gets the lookup table for a threshold set, building it only the first time.
+
+    Tables are kept in lut_cache and the least recently used one is dropped once there are more than max_luts.
+
+    Parameters
+    ----------
+        top : array, optional
+        Lower HSV threshold
+
+        bottom : array, optional
+        Upper HSV threshold
+
+        bits : int, optional
+        Bits kept from each BGR channel
+
+    Return
+    ----------
+        (channel_lut, table) as made by build_lut
+
+    """
+    key = (tuple(top), tuple(bottom), bits)
+    lut = lut_cache.get(key)
+
+    if lut is None:
+        lut = build_lut(top, bottom, bits)
+        lut_cache[key] = lut
+        if len(lut_cache) > max_luts:
+            lut_cache.popitem(last=False)
+    else:
+        lut_cache.move_to_end(key)
+
+    return lut
+
+
+def filter_green_lut(frame, bits=6, index=None, combined=None, mask=None):
+    """
+
+    Filters out green from video input with a lookup table.
+
+    Gives the same mask as filter_green, up to quantization, without converting the frame to HSV.
+
+    Parameters
+    ----------
+        frame : frame
+        The frame from the video input that needs filtering
+
+        bits : int, optional
+        Bits kept from each BGR channel
+
+        index : array, optional
+        int32 buffer of the frame's shape to write per channel table indices into instead of allocating one
+
+        combined : array, optional
+        intp buffer of the frame's height and width to write table indices into instead of allocating one
+
+        mask : array, optional
+        Buffer of the frame's height and width to write the result into instead of allocating one
+
+    Return
+    ----------
+        filtered frame where only the green spectrum specified is considered
+
+    """
+    channel_lut, table = get_lut(bits=bits)
+
+    index = cv2.LUT(frame, channel_lut, dst=index)
+    # Combined in int32 inside the first channel, then widened once, since mixing int32 and intp in one ufunc call
+    # casts through temporary buffers
+    first = index[..., 0]
+    numpy.bitwise_or(first, index[..., 1], out=first)
+    numpy.bitwise_or(first, index[..., 2], out=first)
+    if combined is None:
+        combined = first.astype(numpy.intp)
+    else:
+        numpy.copyto(combined, first)
+
+    return table.take(combined, out=mask, mode="clip")
+
+
+def clean_mask(frame, eroded=None, blurred=None):
+    """
+
+    Removes objects smaller than 5 by 5 pixels from a filtered frame and smooths what is left.
+
+    Parameters
+    ----------
+        frame : frame
+        The filtered frame
+
+        eroded : array, optional
+        Buffer of the frame's shape to erode into instead of allocating one
+
+        blurred : array, optional
+        Buffer of the frame's shape to blur into instead of allocating one
+
+    Return
+    ----------
+        The cleaned mask
+
+    """
+    mask = cv2.erode(frame, kernel, dst=eroded)
+
+    return cv2.blur(mask, (5, 5), dst=blurred)
+
+
+def get_contours(frame, eroded=None, blurred=None):
     """
 
     Finds edged of filtered out objects and makes contours around them. Filtered out objects must be bigger than 5 by
     5 pixles
 
+    Only outer contours are found, the nesting hierarchy of holes is never used.
+
     Parameters
     ----------
         frame : frame
         The filtered frane that now needs contours around objects
 
+        eroded : array, optional
+        Buffer of the frame's shape to erode into instead of allocating one
+
+        blurred : array, optional
+        Buffer of the frame's shape to blur into instead of allocating one
+
     Return
     ----------
-        cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             frame with contours around filtered objects
 
     Cites
@@ -61,59 +253,673 @@ def get_contours(frame):
 
     """
 
-    kernel = numpy.ones((5, 5), numpy.uint8)
-    mask = cv2.erode(frame, kernel)
-    mask = cv2.blur(mask, (5, 5))
+    mask = clean_mask(frame, eroded, blurred)
 
-    return cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    return cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+
+def select_contour(contours, smallest=min_area):
+    """
+
+    Picks the marker out of the contours found.
+
+    The largest contour is taken, so specks of green in the background do not move the basket and the result does not
+    depend on the order findContours returns contours in.
+
+    Parameters
+    ----------
+        contours : list
+        Contours from get_contours
+
+        smallest : float, optional
+        Smallest area a contour needs to count as the marker
+
+    Return
+    ----------
+        The largest contour, None when there is none of at least the smallest area
+
+    """
+    best = None
+    best_area = smallest
+
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area >= best_area:
+            best = contour
+            best_area = area
+
+    return best
+
+
+def blob_from_contours(mask, smallest=min_area, labels=None):
+    """
+
+    Blob backend using outer contours.
+
+    Parameters
+    ----------
+        mask : frame
+        Cleaned mask from clean_mask
+
+        smallest : float, optional
+        Smallest area counted as the marker
+
+        labels : array, optional
+        Not used, taken so every backend is called the same way
+
+    Return
+    ----------
+        Blob of the largest contour, None when there is none of at least the smallest area
+
+    """
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contour = select_contour(contours, smallest)
+
+    if contour is None:
+        return None
+
+    moments = cv2.moments(contour)
+    rect = cv2.boundingRect(contour)
+    if moments["m00"] == 0:
+        centroid = (rect[0] + rect[2] / 2, rect[1] + rect[3] / 2)
+    else:
+        centroid = (moments["m10"] / moments["m00"], moments["m01"] / moments["m00"])
+
+    return Blob(centroid, rect, moments["m00"])
+
+
+def blob_from_components(mask, smallest=min_area, labels=None):
+    """
+
+    Blob backend using connected component statistics.
+
+    Parameters
+    ----------
+        mask : frame
+        Cleaned mask from clean_mask
+
+        smallest : float, optional
+        Smallest area counted as the marker
+
+        labels : array, optional
+        int32 buffer of the mask's shape to write component labels into instead of allocating one
+
+    Return
+    ----------
+        Blob of the largest component, None when there is none of at least the smallest area
+
+    Cites
+    ----------
+    https://docs.opencv.org/4.x/d3/dc0/group__imgproc__shape.html#ga107a78bf7cd25dec05fb4dfc5c9e765f
+
+    """
+    count, _, stats, centroids = cv2.connectedComponentsWithStats(mask, labels, 8, cv2.CV_32S)
+
+    if count < 2:
+        return None
+
+    best = 1 + int(numpy.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    area = stats[best, cv2.CC_STAT_AREA]
+    if area < smallest:
+        return None
+
+    x, y, width, height = (int(value) for value in stats[best, :4])
+    return Blob((centroids[best, 0], centroids[best, 1]), (x, y, width, height), float(area))
+
+
+def blob_from_moments(mask, smallest=min_area, labels=None):
+    """
+
+    Blob backend using image moments of the whole mask.
+
+    Cheapest backend, but every pixel left in the mask counts towards the marker, so it assumes clean_mask removed
+    everything else. The rectangle is estimated from the spread of the pixels as if they formed a filled rectangle.
+
+    Parameters
+    ----------
+        mask : frame
+        Cleaned mask from clean_mask
+
+        smallest : float, optional
+        Smallest area counted as the marker
+
+        labels : array, optional
+        Not used, taken so every backend is called the same way
+
+    Return
+    ----------
+        Blob of all pixels in the mask, None when they cover less than the smallest area
+
+    """
+    moments = cv2.moments(mask, True)
+    area = moments["m00"]
+
+    if area < max(smallest, 1):
+        return None
+
+    centre_x = moments["m10"] / area
+    centre_y = moments["m01"] / area
+    half_width = (3 * moments["mu20"] / area) ** 0.5
+    half_height = (3 * moments["mu02"] / area) ** 0.5
+    rect = (int(round(centre_x - half_width)), int(round(centre_y - half_height)),
+            int(round(2 * half_width)), int(round(2 * half_height)))
+
+    return Blob((centre_x, centre_y), rect, area)
+
+
+# Blob backends by name, for Detector
+blob_backends = {
+    "contours": blob_from_contours,
+    "components": blob_from_components,
+    "moments": blob_from_moments,
+}
 
 
 def get_bounding_rect(video_input):
     """
 
-    Draws a bounding rectangle areas with contours.
+    Finds the bounding rectangle of the marker.
 
-    Video input is taken and a single frame is read. Method calls the filter_green and get_contours methods. Approximate
-    shape is taken based on contoured object and a box is drawn around it.
+    Video input is taken and a single frame is read. Method calls find_rect, which runs the filter_green and
+    get_contours methods and takes the bounding box of the largest contour.
 
     Parameters
     ----------
         video_input : video input from webcam
-        The video input from the webcam
+        The video input from the webcam, either a cv2.VideoCapture or a Camera.FrameGrabber
 
     Return
     ----------
         vertex_x
-            X-value of box"s top left corner
+            X-value of box"s top left corner scaled to frame_width, 0 when no frame is available yet
 
     Cites
     ----------
     https://docs.opencv.org/3.4/da/d0c/tutorial_bounding_rects_circles.html
 
     """
-    _, frame = video_input.read()
+    ok, frame = video_input.read()
+    if not ok:
+        return 0
 
-    mask = filter_green(frame)
+    rect = find_rect(frame)
+    if rect is None:
+        return 0
 
-    contours, _ = get_contours(mask)
+    return int(rect[0] * frame_width / frame.shape[1])
 
-    contours_poly = [None] * len(contours)
-    bound_rect = [None] * len(contours)
 
-    for i, c in enumerate(contours):
-        contours_poly[i] = cv2.approxPolyDP(c, 20, True)
-        bound_rect[i] = cv2.boundingRect(contours_poly[i])
+def find_rect(frame, segment=filter_green, smallest=min_area):
+    """
+
+    Finds the bounding rectangle of the tracked object in a frame.
+
+    Same rectangle get_bounding_rect takes its x value from, without reading the frame.
+
+    Parameters
+    ----------
+        frame : frame
+        The frame, or part of a frame, to search
+
+        segment : function, optional
+        Function making the green mask of the frame, filter_green or filter_green_lut
+
+        smallest : float, optional
+        Smallest contour area counted as the marker
 
-    vertex_x = 0
+    Return
+    ----------
+        (x, y, width, height) of the rectangle, None when nothing was found
 
-    for i in range(len(contours)):
-        vertex_x = int(bound_rect[i][0])
-        vertex_y = int(bound_rect[i][1])
-        cv2.rectangle(frame, (vertex_x, vertex_y),
-                      (int(bound_rect[i][0] + bound_rect[i][2]), int(bound_rect[i][1] + bound_rect[i][3])),
-                      (255, 255, 0), 3)
+    """
+    contour = select_contour(get_contours(segment(frame))[0], smallest)
 
-    return vertex_x
+    if contour is None:
+        return None
+
+    return cv2.boundingRect(contour)
+
+
+def to_frame(blob, left, top, scale=1):
+    """
+
+    Maps a blob found in part of a frame, possibly downscaled, back to full frame coordinates.
+
+    Parameters
+    ----------
+        blob : Blob
+        Blob in the coordinates of the searched image, or None
+
+        left, top : int
+        Full frame position of the searched image's top left corner
+
+        scale : float, optional
+        Scale the searched image was resized by
+
+    Return
+    ----------
+        Blob in full frame coordinates, None when blob is None
+
+    """
+    if blob is None:
+        return None
+
+    x, y, width, height = blob.rect
+    centroid = (blob.centroid[0] / scale + left, blob.centroid[1] / scale + top)
+    rect = (int(x / scale) + left, int(y / scale) + top, int(round(width / scale)), int(round(height / scale)))
+
+    return Blob(centroid, rect, blob.area / (scale * scale))
+
+
+class Detector(object):
+    """
+
+    Stateful detector for the game loop.
+
+    With region of interest tracking on, the last rectangle found is kept and only a padded area around it is searched
+    on the next frame, since the marker only moves a little between frames. A full frame search is done when the marker
+    is lost and every reacquire_interval frames, so a better target coming into view is still picked up.
+
+    The search can also run on a downscaled copy of the frame, since steering only needs a coarse x position. Frames are
+    resized once before filter_green and the rectangles found are mapped back to full resolution. With refine on, the
+    coarse rectangle is searched again at full resolution to get exact coordinates.
+
+    The marker is picked out of the cleaned mask by a blob backend from blob_backends: outer contours, connected
+    component statistics or moments of the whole mask. Every backend gives the same Blob of centroid, rectangle and area.
+
+    Every intermediate image of the pipeline is written into buffers the detector owns, through the dst parameters of
+    the cv2 calls, so steady state frames do not allocate new images. Buffers only grow when a bigger area is searched
+    and smaller areas use contiguous views of their start.
+
+    With a Profiler.Profiler given, the time of each stage in stages is recorded, and get_bounding_rect closes a
+    profiler frame for every video frame.
+
+    get_bounding_rect keeps the time the frame it searched was captured, so what is decided from it can be traced back
+    to the moment the camera saw the marker.
+
+    Attributes
+    ----------
+    roi : bool
+    Whether region of interest tracking is used
+
+    padding : int
+    Pixels added on every side of the last rectangle to make the region of interest
+
+    reacquire_interval : int
+    Most frames in a row that are searched only inside the region of interest
+
+    scale : float
+    Processing scale, for example 0.5 or 0.25, 1 searches at full resolution
+
+    refine : bool
+    Whether a coarse rectangle is searched again at full resolution
+
+    segment : function
+    Function making the green mask, filter_green or filter_green_lut
+
+    min_area : float
+    Smallest contour area in full resolution pixels counted as the marker
+
+    backend : function
+    Blob backend from blob_backends
+
+    debug : bool
+    Whether a copy of each frame with the found rectangle drawn on it is kept in overlay
+
+    profiler : Profiler.Profiler
+    Profiler the stages are timed into, None for no timing
+
+    blob : Blob
+    Last blob found in full frame coordinates, None when the marker is lost
+
+    rect : tuple
+    Rectangle of the last blob, None when the marker is lost
+
+    shape : tuple
+    Shape of the last frame searched, None before the first
+
+    timestamp : float
+    time.perf_counter() value when the frame last searched by get_bounding_rect was captured, when it was read for
+    video inputs that do not give the age of their frames
+
+    overlay : frame
+    Last frame with the found rectangle drawn on it, only kept when debug is on
+
+    buffers : dict
+    Preallocated buffers of the pipeline by name
+
+    """
+
+    def __init__(self, roi=True, padding=100, reacquire_interval=30, scale=1, refine=False, segment=filter_green,
+                 min_area=min_area, backend="contours", debug=False, profiler=None):
+        """
+
+        Detector object constructor
+
+        Parameters
+        ----------
+            roi : bool, optional
+            Whether region of interest tracking is used
+
+            padding : int, optional
+            Pixels added on every side of the last rectangle to make the region of interest
+
+            reacquire_interval : int, optional
+            Most frames in a row that are searched only inside the region of interest
+
+            scale : float, optional
+            Processing scale, for example 0.5 or 0.25, 1 searches at full resolution
+
+            refine : bool, optional
+            Whether a coarse rectangle is searched again at full resolution
+
+            segment : function, optional
+            Function making the green mask, filter_green or filter_green_lut
+
+            min_area : float, optional
+            Smallest contour area in full resolution pixels counted as the marker
+
+            backend : str, optional
+            Name of blob backend in blob_backends
+
+            debug : bool, optional
+            Whether a copy of each frame with the found rectangle drawn on it is kept in overlay
+
+            profiler : Profiler.Profiler, optional
+            Profiler to time the stages into
+
+        """
+        self.roi = roi
+        self.padding = padding
+        self.reacquire_interval = reacquire_interval
+        self.scale = scale
+        self.refine = refine
+        self.segment = segment
+        self.min_area = min_area
+        self.backend = blob_backends[backend]
+        self.debug = debug
+        self.profiler = profiler
+        self.blob = None
+        self.rect = None
+        self.timestamp = 0.0
+        self.shape = None
+        self.overlay = None
+        self.roi_frames = 0
+        self.buffers = {}
+
+    def buffer(self, name, height, width, channels=1, dtype=numpy.uint8):
+        """
+
+        Gets a view of the named buffer with the given size, growing the buffer only when it is too small.
+
+        Buffers are kept flat and the view is the start of one reshaped, so it is contiguous whatever its size. A slice
+        of a bigger 2D buffer would not be, and numpy calls writing to one go through temporary copies.
+
+        Parameters
+        ----------
+            name : str
+            Name of buffer
+
+            height : int
+            Height of view
+
+            width : int
+            Width of view
+
+            channels : int, optional
+            Number of channels, 1 for a plain 2D buffer
+
+            dtype : type, optional
+            numpy type of buffer
+
+        Return
+        ----------
+            Contiguous array view of shape (height, width) or (height, width, channels)
+
+        """
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        size = height * width * channels
+        buffer = self.buffers.get(name)
+
+        if buffer is None or buffer.size < size:
+            buffer = numpy.empty(size, dtype)
+            self.buffers[name] = buffer
+
+        return buffer[:size].reshape(shape)
+
+    def lap(self, stage):
+        """
+
+        Records the time since the previous stage ended, when there is a profiler.
+
+        Parameters
+        ----------
+            stage : str
+            Name of stage from stages
+
+        """
+        if self.profiler is not None:
+            self.profiler.lap(stage)
+
+    def find_blob(self, image, smallest):
+        """
+
+        Finds the tracked object in an image with the detector's blob backend and buffers.
+
+        Parameters
+        ----------
+            image : frame
+            The frame, or part of a frame, to search
+
+            smallest : float
+            Smallest area in the image's pixels counted as the marker
+
+        Return
+        ----------
+            Blob in the image's coordinates, None when nothing was found
+
+        """
+        height, width = image.shape[:2]
+        mask = self.buffer("mask", height, width)
+
+        if self.segment is filter_green_lut:
+            filter_green_lut(image, index=self.buffer("index", height, width, 3, numpy.int32),
+                             combined=self.buffer("combined", height, width, dtype=numpy.intp), mask=mask)
+        else:
+            # filter_green in two steps, so HSV conversion and thresholding are timed apart
+            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=self.buffer("hsv", height, width, 3))
+            self.lap("hsv")
+            cv2.inRange(hsv, top_threshold, bottom_threshold, dst=mask)
+
+        mask = clean_mask(mask, self.buffer("eroded", height, width), self.buffer("blurred", height, width))
+        self.lap("mask")
+
+        # Only connected components writes labels, the other backends would leave an image sized buffer unused
+        labels = None
+        if self.backend is blob_from_components:
+            labels = self.buffer("labels", height, width, dtype=numpy.int32)
+        blob = self.backend(mask, smallest, labels)
+        self.lap("blob")
+        return blob
+
+    def find(self, frame):
+        """
+
+        Finds the bounding rectangle of the tracked object, searching near the last one when possible.
+
+        The full blob, with centroid and area, is kept in the blob attribute. When the frame size changed, for example
+        after the webcam was stepped down to a smaller capture mode, the last rectangle is forgotten, since it is in the
+        old frame's coordinates.
+
+        Parameters
+        ----------
+            frame : frame
+            The full frame from the video input
+
+        Return
+        ----------
+            (x, y, width, height) of the rectangle in full frame coordinates, None when nothing was found
+
+        """
+        blob = None
+
+        if frame.shape != self.shape:
+            self.shape = frame.shape
+            self.rect = None
+
+        if self.roi and self.rect is not None and self.roi_frames < self.reacquire_interval:
+            x, y, width, height = self.rect
+            left = max(x - self.padding, 0)
+            top = max(y - self.padding, 0)
+            right = min(x + width + self.padding, frame.shape[1])
+            bottom = min(y + height + self.padding, frame.shape[0])
+
+            if right > left and bottom > top:
+                blob = self.search(frame, left, top, right, bottom)
+            if blob is not None:
+                self.roi_frames += 1
+
+        if blob is None:
+            blob = self.search(frame, 0, 0, frame.shape[1], frame.shape[0])
+            self.roi_frames = 0
+
+        if blob is not None and self.refine and self.scale != 1:
+            blob = self.refine_blob(frame, blob)
+
+        self.blob = blob
+        self.rect = None if blob is None else blob.rect
+
+        if self.debug:
+            self.overlay = frame.copy()
+            if blob is not None:
+                x, y, width, height = blob.rect
+                cv2.rectangle(self.overlay, (x, y), (x + width, y + height), (255, 255, 0), 3)
+
+        return self.rect
+
+    def search(self, frame, left, top, right, bottom):
+        """
+
+        Searches one area of the frame at the processing scale.
+
+        Parameters
+        ----------
+            frame : frame
+            The full frame from the video input
+
+            left, top, right, bottom : int
+            Edges of the area to search in full frame coordinates
+
+        Return
+        ----------
+            Blob in full frame coordinates, None when nothing was found
+
+        """
+        area = frame[top:bottom, left:right]
+
+        if self.scale == 1:
+            return to_frame(self.find_blob(area, self.min_area), left, top)
+
+        width = max(int(round((right - left) * self.scale)), 1)
+        height = max(int(round((bottom - top) * self.scale)), 1)
+        small = cv2.resize(area, (width, height), dst=self.buffer("small", height, width, 3),
+                           interpolation=cv2.INTER_LINEAR)
+        self.lap("resize")
+
+        return to_frame(self.find_blob(small, self.min_area * self.scale * self.scale), left, top, self.scale)
+
+    def refine_blob(self, frame, blob):
+        """
+
+        Searches again around a coarse blob at full resolution.
+
+        The margin covers the rounding of the downscaled search, so the full resolution object is inside it.
+
+        Parameters
+        ----------
+            frame : frame
+            The full frame from the video input
+
+            blob : Blob
+            Coarse blob in full frame coordinates
+
+        Return
+        ----------
+            The refined blob, or the coarse one when nothing was found around it
+
+        """
+        margin = int(4 / self.scale)
+        x, y, width, height = blob.rect
+        left = max(x - margin, 0)
+        top = max(y - margin, 0)
+        right = min(x + width + margin, frame.shape[1])
+        bottom = min(y + height + margin, frame.shape[0])
+
+        fine = self.find_blob(frame[top:bottom, left:right], self.min_area)
+        if fine is None:
+            return blob
+
+        return to_frame(fine, left, top)
+
+    def get_bounding_rect(self, video_input):
+        """
+
+        Reads a frame and finds the x value of the tracked object, like the get_bounding_rect function.
+
+        Parameters
+        ----------
+            video_input : video input from webcam
+            The video input from the webcam, either a cv2.VideoCapture or a Camera.FrameGrabber
+
+        Return
+        ----------
+            vertex_x
+                X-value of box's top left corner scaled to frame_width, 0 when nothing was found
+
+        """
+        if self.profiler is not None:
+            self.profiler.begin()
+
+        ok, frame = video_input.read()
+        self.timestamp = time.perf_counter() - getattr(video_input, "last_age", 0.0)
+        self.lap("capture")
+        if ok:
+            rect = self.find(frame)
+        else:
+            # Nothing can be found without a frame, so rect tells callers whether the returned x was found
+            rect = self.blob = self.rect = None
+
+        if self.profiler is not None:
+            self.profiler.end_frame()
+
+        if rect is None:
+            return 0
+
+        return int(rect[0] * frame_width / frame.shape[1])
+
+    def get_marker(self):
+        """
+
+        Centroid x and width of the marker found by the last get_bounding_rect, for a Tracker.
+
+        Return
+        ----------
+            (centre_x, width)
+                both scaled to frame_width, None when nothing was found
+
+        """
+        if self.blob is None:
+            return None
+        scale = frame_width / self.shape[1]
+        return self.blob.centroid[0] * scale, self.blob.rect[2] * scale
+
+    def get_move(self, video_input):
+        """
+
+        Move value is determined, same values as the get_move function.
+
+        """
+        return move_from_x(self.get_bounding_rect(video_input))
 
 
 def get_move(webcam):
@@ -122,7 +928,8 @@ def get_move(webcam):
     Move value is determined.
 
     Video input is taken from webcam and is fed through get_bounding_rect method which returns the value we need. A
-    decision for the move is made based on where the object is in the webcam.
+    decision for the move is made based on where the object is in the webcam. When webcam is a Camera.FrameGrabber the
+    newest frame is used without waiting on the camera and its age is left in webcam.last_age.
 
     Parameters
     ----------
@@ -137,13 +944,218 @@ def get_move(webcam):
         2= Right
 
     """
-    x_position = get_bounding_rect(webcam)
+    return move_from_x(get_bounding_rect(webcam))
 
-    if x_position > 450:
+
+def move_from_x(x_position):
+    """
+
+    Move value is determined from an x position.
+
+    Parameters
+    ----------
+        x_position : int
+        X-value of the tracked box's top left corner, 0 when nothing was found
+
+    Return
+    ----------
+        Value of move, same values as get_move
+
+    """
+    if x_position > move_left:
         return 1
 
-    elif 0 < x_position < 250:
+    elif 0 < x_position < move_right:
         return 2
 
     else:
-        return 0
\ No newline at end of file
+        return 0
+
+
+class Tracker(object):
+    """
+
+    Filtered marker position between camera frames.
+
+    An alpha-beta filter, a steady state Kalman filter for constant velocity, keeps an estimate of the x position of the
+    marker's centroid and its velocity. Each measurement corrects the estimate by a fixed share alpha of the difference
+    from the prediction, and the velocity by a share beta of that difference per second. In between, the position is
+    extrapolated from the last measurement, so the game can ask for it at every tick however slowly frames arrive.
+
+    A missed detection keeps the estimate, and it is extrapolated for up to max_coast seconds after the last
+    measurement. After that the marker counts as lost and no move is made, and the next measurement starts over.
+
+    get_move makes the same decision as move_from_x from the marker's left edge, half the last measured width left of
+    the centroid, with the thresholds moved out by hysteresis pixels while the current move is kept, so a marker
+    resting on a threshold does not flicker between moves. get_position gives the prediction itself as a share of the
+    distance the centroid can travel, for steering the basket straight to the marker.
+
+    Attributes
+    ----------
+    alpha : float
+    Share of each position error applied to the position
+
+    beta : float
+    Share of each position error per second applied to the velocity
+
+    max_coast : float
+    Seconds the position is extrapolated after the last measurement before the marker counts as lost
+
+    hysteresis : float
+    Pixels the thresholds are moved out by while the current move is kept
+
+    x : float
+    Filtered centroid x position at time, in frame_width pixels, None before the first measurement
+
+    width : float
+    Width of the marker in the last measurement, in frame_width pixels
+
+    velocity : float
+    Filtered velocity in pixels per second
+
+    time : float
+    time.perf_counter() value when the frame of the last measurement was captured
+
+    move : int
+    Last move value from get_move
+
+    Cites
+    ----------
+    https://en.wikipedia.org/wiki/Alpha_beta_filter
+
+    """
+
+    def __init__(self, alpha=0.5, beta=0.15, max_coast=0.25, hysteresis=20):
+        """
+
+        Tracker object constructor
+
+        Parameters
+        ----------
+            alpha : float, optional
+            Share of each position error applied to the position
+
+            beta : float, optional
+            Share of each position error per second applied to the velocity
+
+            max_coast : float, optional
+            Seconds the position is extrapolated after the last measurement before the marker counts as lost
+
+            hysteresis : float, optional
+            Pixels the thresholds are moved out by while the current move is kept
+
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.max_coast = max_coast
+        self.hysteresis = hysteresis
+        self.x = None
+        self.width = 0.0
+        self.velocity = 0.0
+        self.time = 0.0
+        self.move = 0
+
+    def update(self, x_position, timestamp, width=0.0):
+        """
+
+        Corrects the estimate with a measurement.
+
+        Parameters
+        ----------
+            x_position : float
+            Measured centroid x position in frame_width pixels, None when the marker was not found in the frame
+
+            timestamp : float
+            time.perf_counter() value when the frame was captured
+
+            width : float, optional
+            Measured width of the marker in frame_width pixels
+
+        """
+        if x_position is None:
+            return
+
+        self.width = float(width)
+        elapsed = timestamp - self.time
+        if self.x is None or elapsed > self.max_coast:
+            self.x = float(x_position)
+            self.velocity = 0.0
+        elif elapsed > 0:
+            predicted = self.x + self.velocity * elapsed
+            error = x_position - predicted
+            self.x = predicted + self.alpha * error
+            self.velocity += self.beta * error / elapsed
+        self.time = max(timestamp, self.time)
+
+    def predict(self, now):
+        """
+
+        Estimated centroid x position at a time.
+
+        Parameters
+        ----------
+            now : float
+            time.perf_counter() value to predict for
+
+        Return
+        ----------
+            Centroid x position in frame_width pixels, kept inside the frame, None when the marker is lost
+
+        """
+        if self.x is None or now - self.time > self.max_coast:
+            return None
+        x_position = self.x + self.velocity * max(now - self.time, 0)
+        return min(max(x_position, 0), frame_width)
+
+    def get_move(self, now):
+        """
+
+        Move value from the predicted position, same values as the get_move function.
+
+        Parameters
+        ----------
+            now : float
+            time.perf_counter() value to decide for
+
+        """
+        x_position = self.predict(now)
+        if x_position is None:
+            self.move = 0
+            return self.move
+
+        x_position -= self.width / 2
+        if x_position > move_left - (self.hysteresis if self.move == 1 else 0):
+            self.move = 1
+        elif x_position < move_right + (self.hysteresis if self.move == 2 else 0):
+            self.move = 2
+        else:
+            self.move = 0
+        return self.move
+
+    def get_position(self, now):
+        """
+
+        Predicted marker position and velocity, normalized to the distance the marker's centroid can travel.
+
+        A marker can not go further out than touching an edge of the frame, so its centroid stays half its width from
+        the edges. Positions are measured over what is left, so a marker centred in the frame is at 0.5 and one
+        touching an edge at 0 or 1, whatever its size.
+
+        Parameters
+        ----------
+            now : float
+            time.perf_counter() value to predict for
+
+        Return
+        ----------
+            (position, velocity), None when the marker is lost
+                position is 0 with the marker at the left edge of the frame and 1 at the right edge, velocity is in
+                the same units per second
+
+        """
+        x_position = self.predict(now)
+        if x_position is None:
+            return None
+        span = max(frame_width - self.width, 1.0)
+        position = (x_position - self.width / 2) / span
+        return min(max(position, 0.0), 1.0), self.velocity / span
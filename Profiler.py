@@ -0,0 +1,182 @@
+"""Fruit Catcher Profiler | Profiler.py
+
+This file is responsible for timing the stages of a frame. The Game file times its loop (input, simulation, drawing,
+display update) and ObjectDetection times the vision pipeline (capture, resize, HSV, mask, blob). Recent frames are
+kept for rolling averages and percentiles shown on the in-game overlay, and every frame can be written to a CSV or
+JSON trace file to look at afterwards.
+"""
+
+import csv
+import json
+import time
+from collections import OrderedDict, deque
+
+import numpy
+
+
+class Profiler(object):
+    """
+
+    Frame time recorder.
+
+    Time spent in each named stage is added up over a frame, either with lap, which times from the previous lap or
+    begin, or with add for times measured elsewhere. end_frame closes the frame: its stage times go into a rolling
+    window per stage and a row of the trace.
+
+    Attributes
+    ----------
+    window : int
+    Number of recent frames kept per stage for summary
+
+    stages : OrderedDict
+    Stage name to deque of its recent times in seconds, in the order stages were first seen
+
+    frame : OrderedDict
+    Stage name to seconds spent in the frame being recorded
+
+    latest : OrderedDict
+    Stage times of the last frame closed
+
+    trace : deque
+    Row of stage times in milliseconds for each recent frame, with its frame number and time
+
+    frames : int
+    Number of frames closed so far
+
+    Cites
+    ----------
+    https://docs.python.org/3/library/time.html#time.perf_counter
+
+    """
+
+    def __init__(self, window=120, max_trace=0):
+        """
+
+        Profiler object constructor
+
+        Parameters
+        ----------
+            window : int, optional
+            Number of recent frames kept per stage for summary
+
+            max_trace : int, optional
+            Most frames kept for the trace file, the oldest are dropped first, 0 keeps no trace
+
+        """
+        self.window = window
+        self.stages = OrderedDict()
+        self.frame = OrderedDict()
+        self.latest = OrderedDict()
+        self.trace = deque(maxlen=max_trace)
+        self.frames = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def begin(self):
+        """
+
+        Starts timing from now, for the next lap.
+
+        """
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        """
+
+        Adds the time since the previous lap or begin to a stage.
+
+        Parameters
+        ----------
+            name : str
+            Name of stage
+
+        """
+        now = time.perf_counter()
+        self.add(name, now - self.last)
+        self.last = now
+
+    def add(self, name, seconds):
+        """
+
+        Adds time to a stage of the frame being recorded.
+
+        Parameters
+        ----------
+            name : str
+            Name of stage
+
+            seconds : float
+            Time spent in the stage
+
+        """
+        self.frame[name] = self.frame.get(name, 0.0) + seconds
+
+    def end_frame(self):
+        """
+
+        Closes the frame being recorded.
+
+        """
+        for name, seconds in self.frame.items():
+            times = self.stages.get(name)
+            if times is None:
+                times = self.stages[name] = deque(maxlen=self.window)
+            times.append(seconds)
+
+        if self.trace.maxlen:
+            row = {"frame": self.frames, "time": round(time.perf_counter() - self.start, 6)}
+            for name, seconds in self.frame.items():
+                row[name] = round(seconds * 1000, 4)
+            self.trace.append(row)
+
+        self.latest, self.frame = self.frame, self.latest
+        self.frame.clear()
+        self.frames += 1
+
+    def summary(self):
+        """
+
+        Rolling statistics of every stage over the recent frames.
+
+        Return
+        ----------
+            OrderedDict of stage name to (mean, p50, p95, p99) in milliseconds
+
+        """
+        results = OrderedDict()
+        for name, times in self.stages.items():
+            if times:
+                milliseconds = numpy.array(times) * 1000
+                p50, p95, p99 = numpy.percentile(milliseconds, [50, 95, 99])
+                results[name] = (float(milliseconds.mean()), float(p50), float(p95), float(p99))
+        return results
+
+    def export(self, path):
+        """
+
+        Writes the trace to a file, CSV when the path ends in .csv and JSON otherwise.
+
+        Every row is one frame, with a column of milliseconds per stage. Stages not run in a frame are left empty in
+        CSV and missing in JSON.
+
+        Parameters
+        ----------
+            path : str
+            Path of file to write
+
+        """
+        columns = ["frame", "time"]
+        for row in self.trace:
+            for name in row:
+                if name not in columns:
+                    columns.append(name)
+
+        with open(path, "w", newline="") as file:
+            if path.lower().endswith(".csv"):
+                writer = csv.DictWriter(file, columns)
+                writer.writeheader()
+                writer.writerows(self.trace)
+            else:
+                summary = OrderedDict((name, OrderedDict(zip(("mean", "p50", "p95", "p99"), values)))
+                                      for name, values in self.summary().items())
+                json.dump({"stages": columns[2:], "summary": summary, "frames": list(self.trace)}, file)
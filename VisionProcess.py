@@ -0,0 +1,264 @@
+"""Fruit Catcher Vision Process | VisionProcess.py
+
+This file is responsible for running the whole ObjectDetection pipeline in a separate process. The worker owns the
+webcam, runs capture, filtering, contours and bounding rects on its own core and publishes the latest tracked position
+through shared memory, with the time each stage of the pipeline took on the newest frame. The Game file only reads
+that position, so vision spikes do not slow down the game loop.
+"""
+
+import atexit
+import math
+import multiprocessing
+import time
+from collections import OrderedDict
+
+import Camera
+import ObjectDetection
+import Profiler
+
+# Slots of the shared state array, the x position, centre and width are NaN when the marker was not found and the
+# timestamp is when the frame it was found in was captured
+X_POSITION = 0
+TIMESTAMP = 1
+FRAME_ID = 2
+CENTRE = 3
+WIDTH = 4
+# First of the slots holding seconds spent in each of ObjectDetection.stages
+STAGES = 5
+
+
+def run(source, api_preference, budget, state, stopped, active):
+    """
+
+    Worker process loop.
+
+    Opens the webcam inside the worker, since a cv2.VideoCapture can not be handed between processes, and keeps
+    publishing the newest x position until the stop event is set. The webcam is stepped down to cheaper capture modes
+    by a Camera.CaptureTuner when the pipeline is over budget.
+
+    Parameters
+    ----------
+        source : int
+        Index of webcam to open
+
+        api_preference : int
+        cv2 capture backend to open the webcam with, None for Camera.default_backend()
+
+        budget : float
+        Most seconds the pipeline may take per frame on average before the webcam is stepped down
+
+        state : multiprocessing.Array
+        Shared array holding the x position, capture time, frame count, marker centre and width and stage times
+
+        stopped : multiprocessing.Event
+        Set by the game to ask the worker to finish
+
+        active : multiprocessing.Event
+        Cleared by the game while it does not need the webcam, the worker sleeps in the meantime
+
+    """
+    video_input = Camera.open_camera(source, api_preference=api_preference)
+    tuner = Camera.CaptureTuner(video_input, budget)
+    profiler = Profiler.Profiler(window=1, max_trace=0)
+    detector = ObjectDetection.Detector(scale=0.5, profiler=profiler)
+    try:
+        while video_input.isOpened() and not stopped.is_set():
+            # Wakes up now and then while paused to see whether it was stopped
+            if not active.wait(0.25):
+                continue
+            x_position = detector.get_bounding_rect(video_input)
+            centre, width = detector.get_marker() or (math.nan, math.nan)
+            with state.get_lock():
+                state[X_POSITION] = math.nan if detector.rect is None else x_position
+                state[CENTRE] = centre
+                state[WIDTH] = width
+                state[TIMESTAMP] = detector.timestamp
+                state[FRAME_ID] += 1
+                for i, stage in enumerate(ObjectDetection.stages):
+                    state[STAGES + i] = profiler.latest.get(stage, 0.0)
+            # Reading blocks until the webcam has a new frame, so only the work after it counts against the budget
+            tuner.update(sum(seconds for stage, seconds in profiler.latest.items() if stage != "capture"))
+    finally:
+        video_input.release()
+
+
+class VisionProcess(object):
+    """
+
+    Handle to the vision worker process.
+
+    Attributes
+    ----------
+    source : int
+    Index of webcam used by the worker
+
+    api_preference : int
+    cv2 capture backend used by the worker, None for Camera.default_backend()
+
+    budget : float
+    Most seconds the worker may take per frame on average before the webcam is stepped down
+
+    state : multiprocessing.Array
+    Shared array the worker publishes the tracked position to
+
+    Cites
+    ----------
+    https://docs.python.org/3/library/multiprocessing.html#sharing-state-between-processes
+
+    """
+
+    def __init__(self, source=0, api_preference=None, budget=0.03):
+        """
+
+        VisionProcess object constructor
+
+        Parameters
+        ----------
+            source : int, optional
+            Index of webcam to open
+
+            api_preference : int, optional
+            cv2 capture backend to open the webcam with, Camera.default_backend() when not given
+
+            budget : float, optional
+            Most seconds the worker may take per frame on average before the webcam is stepped down, just under the
+            frame interval of a 30 FPS webcam by default
+
+        """
+        self.source = source
+        self.api_preference = api_preference
+        self.budget = budget
+        self.state = multiprocessing.Array('d', STAGES + len(ObjectDetection.stages))
+        self.stopped = multiprocessing.Event()
+        self.active = multiprocessing.Event()
+        self.active.set()
+        self.process = None
+
+    def start(self):
+        """
+
+        Starts the worker process.
+
+        Return
+        ----------
+            self, so the process can be made and started in one line
+
+        """
+        if self.process is None:
+            self.stopped.clear()
+            self.process = multiprocessing.Process(target=run, name="VisionProcess", daemon=True,
+                                                   args=(self.source, self.api_preference, self.budget, self.state,
+                                                         self.stopped, self.active))
+            self.process.start()
+            atexit.register(self.stop)
+        return self
+
+    def get_x_position(self):
+        """
+
+        Latest tracked position.
+
+        Return
+        ----------
+            (x_position, age)
+                x position published by the worker, None when the marker was not found, and seconds since the frame
+                it was found in was captured, both None before the first frame
+
+        """
+        with self.state.get_lock():
+            x_position = self.state[X_POSITION]
+            timestamp = self.state[TIMESTAMP]
+            frame_id = self.state[FRAME_ID]
+        if frame_id == 0:
+            return None, None
+        if math.isnan(x_position):
+            x_position = None
+        else:
+            x_position = int(x_position)
+        return x_position, time.perf_counter() - timestamp
+
+    def get_marker(self):
+        """
+
+        Latest marker centroid and width, for an ObjectDetection.Tracker.
+
+        Return
+        ----------
+            (marker, age)
+                (centre_x, width) scaled to frame_width, None when the marker was not found, and seconds since the
+                frame it was found in was captured, both None before the first frame
+
+        """
+        with self.state.get_lock():
+            centre = self.state[CENTRE]
+            width = self.state[WIDTH]
+            timestamp = self.state[TIMESTAMP]
+            frame_id = self.state[FRAME_ID]
+        if frame_id == 0:
+            return None, None
+        marker = None if math.isnan(centre) else (centre, width)
+        return marker, time.perf_counter() - timestamp
+
+    def get_stage_times(self):
+        """
+
+        Time each stage of the pipeline took on the newest frame.
+
+        Return
+        ----------
+            (frame_id, stage_times)
+                count of frames processed and OrderedDict of stage name to seconds
+
+        """
+        with self.state.get_lock():
+            frame_id = int(self.state[FRAME_ID])
+            times = self.state[STAGES:STAGES + len(ObjectDetection.stages)]
+        return frame_id, OrderedDict(zip(ObjectDetection.stages, times))
+
+    def get_move(self):
+        """
+
+        Move value from the latest tracked position, same values as ObjectDetection.get_move.
+
+        """
+        x_position, _ = self.get_x_position()
+        return ObjectDetection.move_from_x(0 if x_position is None else x_position)
+
+    def pause(self):
+        """
+
+        Asks the worker to stop reading the webcam until resume.
+
+        """
+        self.active.clear()
+
+    def resume(self):
+        """
+
+        Asks the worker to read the webcam again after pause.
+
+        """
+        self.active.set()
+
+    def stop(self, timeout=2):
+        """
+
+        Shuts the worker down.
+
+        The worker is asked to stop so it can release the webcam, and is terminated only if it does not finish in time.
+
+        Parameters
+        ----------
+            timeout : float, optional
+            Seconds to wait for the worker before terminating it
+
+        """
+        if self.process is None:
+            return
+        self.stopped.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+        atexit.unregister(self.stop)